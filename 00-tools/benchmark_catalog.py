@@ -0,0 +1,80 @@
+# Measures find_products query latency on a generated catalog of 1M products
+
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from catalog import ProductCatalog
+from rich.console import Console
+from rich.table import Table
+
+PRODUCTS = 1_000_000
+RUNS = 20
+
+BRANDS = ["surface", "xbox", "garmin", "dell", "nvidia", "coral", "azure", "lenovo"]
+KINDS = ["laptop", "keyboard", "tablet", "console", "gps", "accelerator", "monitor"]
+FEATURES = ["pro", "ultra", "mini", "wireless", "gaming", "ergonomic", "oled", "edge"]
+CATEGORIES = ["ai", "microsoft", "electronics", "gaming", "office"]
+
+QUERIES = {
+    "exact": ("laptop", None),
+    "exact + category": ("wireless keyboard", "microsoft"),
+    "prefix": ("acce", None),
+    "fuzzy": ("keybord", None),
+    "rare token": ("model 4242", None),
+}
+
+console = Console()
+
+
+def generate_catalog(path: Path):
+    rng = random.Random(42)
+    with open(path, "w") as f:
+        for product_id in range(PRODUCTS):
+            name = f"{rng.choice(BRANDS)} {rng.choice(FEATURES)} {rng.choice(KINDS)}"
+            product = {
+                "id": product_id,
+                "name": name.title(),
+                "category": rng.choice(CATEGORIES),
+                "description": f"Model {product_id % 10_000} {rng.choice(FEATURES)}",
+            }
+            f.write(json.dumps(product) + "\n")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "products.jsonl"
+        console.print(f"Generating {PRODUCTS:,} products...", style="bold yellow")
+        generate_catalog(path)
+
+        start = time.perf_counter()
+        catalog = ProductCatalog(path)
+        console.print(
+            f"Indexed in {time.perf_counter() - start:.1f}s", style="bold yellow"
+        )
+
+        table = Table(title=f"Query latency over {PRODUCTS:,} products, top 10")
+        for column in ("query", "mean ms", "p50 ms", "max ms"):
+            table.add_column(column)
+
+        for label, (query, category) in QUERIES.items():
+            timings = []
+            for _ in range(RUNS):
+                start = time.perf_counter()
+                catalog.search(query, category=category, limit=10)
+                timings.append((time.perf_counter() - start) * 1000)
+            table.add_row(
+                f"{label}: '{query}'",
+                f"{statistics.mean(timings):.2f}",
+                f"{statistics.median(timings):.2f}",
+                f"{max(timings):.2f}",
+            )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# In-memory product catalog with an inverted index, category bitmaps and fuzzy matching
+
+import bisect
+import csv
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+from array import array
+from pathlib import Path
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Score multipliers of the different ways a query token can match an indexed token
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.6
+FUZZY_WEIGHT = 0.4
+
+# Terms found in more than this share of the catalog only boost other matches
+COMMON_TERM_RATIO = 0.1
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _deletes(token: str) -> set[str]:
+    """All the strings obtained by removing one character from the token."""
+    return {token[:i] + token[i + 1 :] for i in range(len(token))}
+
+
+class ProductCatalog:
+    """Products loaded from a JSONL or CSV file and indexed for search.
+
+    Every product needs an ``id``, a ``name`` and a ``category``, an optional
+    ``description`` is indexed too. Appends to a JSONL file are indexed
+    incrementally, any other change to the file triggers a full rebuild.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.products: list[dict] = []
+        self._postings: dict[str, array] = {}
+        self._vocabulary: list[str] = []
+        self._deletes: dict[str, set[str]] | None = None
+        self._categories: dict[str, bytearray] = {}
+        self._term_bitmaps: dict[str, bytearray] = {}
+        self._mtime = 0.0
+        # Bytes of the file indexed so far, a line still being written is left out
+        self._size = 0
+        self._tail = b""
+        self.refresh()
+
+    # --- Loading ---
+
+    def refresh(self) -> bool:
+        """Reindex the file if it changed since the last load, returns True if it did."""
+        stat = os.stat(self.path)
+        if stat.st_mtime == self._mtime and stat.st_size == self._size:
+            return False
+
+        if self._is_append(stat.st_size):
+            with open(self.path, "rb") as f:
+                f.seek(self._size)
+                products, parsed = self._parse_jsonl(f.read())
+            self._mtime = stat.st_mtime
+            if not parsed:
+                # Only a line still being written, it is indexed once complete
+                return False
+            self._add_products(products)
+            self._size += parsed
+        else:
+            self._reset()
+            products, self._size = self._read_all(stat.st_size)
+            self._add_products(products)
+            self._mtime = stat.st_mtime
+
+        with open(self.path, "rb") as f:
+            start = max(0, self._size - 256)
+            f.seek(start)
+            self._tail = f.read(self._size - start)
+        return True
+
+    def _is_append(self, size: int) -> bool:
+        """True when the JSONL file only grew and its previous content is unchanged."""
+        if self.path.suffix != ".jsonl" or not self._size or size <= self._size:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(self._size - len(self._tail))
+            return f.read(len(self._tail)) == self._tail
+
+    def _read_all(self, size: int) -> tuple[list[dict], int]:
+        """All the products of the file and the number of bytes they were parsed from."""
+        if self.path.suffix == ".csv":
+            with open(self.path, newline="") as f:
+                return list(csv.DictReader(f)), size
+        with open(self.path, "rb") as f:
+            data = f.read()
+        products, parsed = self._parse_jsonl(data)
+        # The last line of a file that is not being appended to may lack a newline
+        last = data[parsed:]
+        if last.strip():
+            try:
+                products.append(json.loads(last))
+                parsed = len(data)
+            except json.JSONDecodeError:
+                pass
+        return products, parsed
+
+    @staticmethod
+    def _parse_jsonl(data: bytes) -> tuple[list[dict], int]:
+        """Products of the complete lines and the number of bytes they span.
+
+        Bytes after the last newline are a line still being written, they are
+        left for the next refresh.
+        """
+        parsed = data.rfind(b"\n") + 1
+        lines = data[:parsed].splitlines()
+        return [json.loads(line) for line in lines if line.strip()], parsed
+
+    def _reset(self):
+        self.products = []
+        self._postings = {}
+        self._categories = {}
+
+    def _add_products(self, products: list[dict]):
+        for product in products:
+            doc_id = len(self.products)
+            self.products.append(product)
+
+            text = f"{product['name']} {product.get('description', '')}"
+            for token in set(tokenize(text)):
+                if token not in self._postings:
+                    self._postings[token] = array("I")
+                self._postings[token].append(doc_id)
+
+            # One bit per product in the bitmap of its category
+            bitmap = self._categories.setdefault(product["category"], bytearray())
+            if len(bitmap) <= doc_id >> 3:
+                bitmap.extend(bytes((doc_id >> 3) + 1 - len(bitmap)))
+            bitmap[doc_id >> 3] |= 1 << (doc_id & 7)
+
+        self._vocabulary = sorted(self._postings)
+        # The fuzzy index and term bitmaps are rebuilt lazily on next use
+        self._deletes = None
+        self._term_bitmaps = {}
+
+    # --- Matching ---
+
+    def _in_category(self, doc_id: int, bitmap: bytearray) -> bool:
+        byte = doc_id >> 3
+        return byte < len(bitmap) and bool(bitmap[byte] & (1 << (doc_id & 7)))
+
+    def _term_bitmap(self, term: str) -> bytearray:
+        """Bitmap of the products containing a common term, built on first use."""
+        if term not in self._term_bitmaps:
+            bitmap = bytearray((len(self.products) >> 3) + 1)
+            for doc_id in self._postings[term]:
+                bitmap[doc_id >> 3] |= 1 << (doc_id & 7)
+            self._term_bitmaps[term] = bitmap
+        return self._term_bitmaps[term]
+
+    def _prefix_matches(self, token: str) -> list[str]:
+        start = bisect.bisect_left(self._vocabulary, token)
+        end = bisect.bisect_left(self._vocabulary, token + "\uffff")
+        return self._vocabulary[start:end]
+
+    def _fuzzy_matches(self, token: str) -> set[str]:
+        """Indexed tokens within one edit (insert, delete or substitution) of the token."""
+        if self._deletes is None:
+            self._deletes = {}
+            for term in self._vocabulary:
+                for variant in _deletes(term) | {term}:
+                    self._deletes.setdefault(variant, set()).add(term)
+
+        matches = set()
+        for variant in _deletes(token) | {token}:
+            matches |= self._deletes.get(variant, set())
+        return matches
+
+    def _matching_terms(self, token: str) -> dict[str, float]:
+        """Indexed terms matching a query token, with the weight of the best match."""
+        terms = {}
+        # Very short tokens would match too much of the vocabulary as prefixes or typos
+        if len(token) >= 4:
+            for term in self._fuzzy_matches(token):
+                terms[term] = FUZZY_WEIGHT
+        if len(token) >= 2:
+            for term in self._prefix_matches(token):
+                terms[term] = PREFIX_WEIGHT
+        if token in self._postings:
+            terms[token] = EXACT_WEIGHT
+        return terms
+
+    # --- Search ---
+
+    def search(
+        self,
+        query: str,
+        category: str | None = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[dict]:
+        """Return one page of the products best matching the query."""
+        self.refresh()
+        bitmap = None
+        if category is not None:
+            bitmap = self._categories.get(category)
+            if bitmap is None:
+                return []
+
+        tokens = tokenize(query)
+        if not tokens:
+            # Without a query every product of the category matches, in file order
+            matches = (
+                product
+                for doc_id, product in enumerate(self.products)
+                if bitmap is None or self._in_category(doc_id, bitmap)
+            )
+            return list(itertools.islice(matches, offset, offset + limit))
+
+        # Weight of every indexed term matched by any of the query tokens
+        total = len(self.products)
+        term_scores: dict[str, float] = {}
+        for token in tokens:
+            for term, weight in self._matching_terms(token).items():
+                # Rare terms say more about a product than common ones
+                idf = math.log(1 + total / len(self._postings[term]))
+                term_scores[term] = term_scores.get(term, 0.0) + weight * idf
+
+        if len(term_scores) == 1:
+            # A single term gives every match the same score, the first ones win
+            (term,) = term_scores
+            matches = (
+                self.products[doc_id]
+                for doc_id in self._postings[term]
+                if bitmap is None or self._in_category(doc_id, bitmap)
+            )
+            return list(itertools.islice(matches, offset, offset + limit))
+
+        scores: dict[int, float] = {}
+        for term in sorted(term_scores, key=lambda term: len(self._postings[term])):
+            postings = self._postings[term]
+            score = term_scores[term]
+            if scores and len(postings) > COMMON_TERM_RATIO * total:
+                # Like a stop word, a very common term only boosts products already found
+                term_bitmap = self._term_bitmap(term)
+                for doc_id in scores:
+                    if self._in_category(doc_id, term_bitmap):
+                        scores[doc_id] += score
+            else:
+                for doc_id in postings:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        if bitmap is not None:
+            scores = {
+                doc_id: score
+                for doc_id, score in scores.items()
+                if self._in_category(doc_id, bitmap)
+            }
+
+        # Only the top offset + limit products are ranked, ties keep file order
+        ranked = heapq.nsmallest(
+            offset + limit, scores.items(), key=lambda item: (-item[1], item[0])
+        )
+        return [self.products[doc_id] for doc_id, _ in ranked[offset:]]
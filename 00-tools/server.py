@@ -1,6 +1,9 @@
+import os
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Annotated
 
+from catalog import ProductCatalog
 from fastmcp import FastMCP
 from fastmcp.exceptions import ToolError
 from pydantic import Field
@@ -18,6 +21,11 @@ mcp = FastMCP(
     include_fastmcp_meta=False,  # Disable FastMCP metadata for cleaner integration
 )
 
+# Product catalog backing find_products, reindexed automatically when the file changes
+catalog = ProductCatalog(
+    os.getenv("CATALOG_PATH", Path(__file__).parent / "products.jsonl")
+)
+
 
 @dataclass
 class Person:
@@ -86,11 +94,17 @@ def search_products(
     category: Annotated[
         Literal["ai", "microsoft"] | None, Field(description="The desired category")
     ] = None,
+    limit: Annotated[
+        int, Field(description="Maximum number of products to return", ge=1, le=100)
+    ] = 10,
+    offset: Annotated[
+        int, Field(description="Number of top results to skip, for paging", ge=0)
+    ] = 0,
 ) -> Annotated[
     list[dict], Field(description="A list of products matching the search criteria.")
 ]:
     print(f"Searching for '{query}' in category '{category}'")
-    return [{"id": 2, "name": "Garmin GPS", "category": "electronics"}]
+    return catalog.search(query, category=category, limit=limit, offset=offset)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 from fastmcp import FastMCP
+from idempotent_cache import IdempotentCacheMiddleware
 from starlette.requests import Request
-from starlette.responses import PlainTextResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 
 mcp = FastMCP(
     name="Routes Server",
@@ -10,6 +11,10 @@ mcp = FastMCP(
     on_duplicate_prompts="replace",
 )
 
+# Memoizes every tool and resource annotated with idempotentHint=True
+cache = IdempotentCacheMiddleware(ttl=30.0)
+mcp.add_middleware(cache)
+
 
 @mcp.tool(
     tags={"dev", "admin"},  # Note how tags can be used to filter tools
@@ -30,5 +35,11 @@ async def health_check(request: Request) -> PlainTextResponse:
     return PlainTextResponse("Server is OK")
 
 
+# Hit/miss counters of the idempotent result cache
+@mcp.custom_route("/cache-stats", methods=["GET"])
+async def cache_stats(request: Request) -> JSONResponse:
+    return JSONResponse(cache.stats())
+
+
 if __name__ == "__main__":
     mcp.run(transport="http", host="localhost", port=8000)
@@ -0,0 +1,122 @@
+# Measures the server's peak memory serving large blobs to concurrent clients
+
+import asyncio
+import base64
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from blobs import stream_blob
+from fastmcp import Client
+from rich.console import Console
+from rich.table import Table
+
+URL = "http://localhost:8000/mcp"
+MB = 1024 * 1024
+# Blob size in MB, concurrent clients, whether the blob is read whole
+RUNS = [(100, 1, True), (100, 1, False), (500, 1, False), (500, 4, False)]
+
+# The server, plus a resource returning a whole file as one blob to compare with
+SERVER = """
+import os
+from pathlib import Path
+import server
+
+@server.mcp.resource("blob://{name}/whole", mime_type="application/octet-stream")
+def get_whole_blob(name: str) -> bytes:
+    return (Path(os.environ["BLOB_DIR"]) / name).read_bytes()
+
+server.mcp.run(transport="http", host="localhost", port=8000, log_level="warning")
+"""
+
+console = Console()
+
+
+def peak_rss_mb(pid: int) -> float:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def wait_for_server():
+    for _ in range(100):
+        try:
+            async with Client(URL) as client:
+                await client.ping()
+                return
+        except Exception:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("The server did not start")
+
+
+async def download(name: str, whole: bool) -> int:
+    async with Client(URL) as client:
+        if whole:
+            contents = await client.read_resource(f"blob://{name}/whole")
+            return len(base64.b64decode(contents[0].blob))
+        size = 0
+        async for chunk in stream_blob(client, name):
+            size += len(chunk)
+        return size
+
+
+async def run(blob_dir: Path, size_mb: int, clients: int, whole: bool) -> list[str]:
+    server = subprocess.Popen(
+        [sys.executable, "-c", SERVER],
+        cwd=Path(__file__).parent,
+        env={**os.environ, "BLOB_DIR": str(blob_dir)},
+    )
+    try:
+        await wait_for_server()
+        idle = peak_rss_mb(server.pid)
+        name = f"blob{size_mb}.bin"
+        start = time.perf_counter()
+        sizes = await asyncio.gather(*(download(name, whole) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        assert all(size == size_mb * MB for size in sizes)
+        return [
+            f"{size_mb} MB",
+            str(clients),
+            "whole" if whole else "chunks",
+            f"{elapsed:.1f}",
+            f"{size_mb * clients / elapsed:.0f}",
+            f"{idle:.0f}",
+            f"{peak_rss_mb(server.pid):.0f}",
+        ]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main():
+    table = Table(title="Serving blobs over HTTP, server memory")
+    for column in (
+        "blob",
+        "clients",
+        "read",
+        "seconds",
+        "MB/s",
+        "idle RSS MB",
+        "peak RSS MB",
+    ):
+        table.add_column(column)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        blob_dir = Path(tmp)
+        for size_mb in {size for size, _, _ in RUNS}:
+            with open(blob_dir / f"blob{size_mb}.bin", "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(MB))
+
+        for size_mb, clients, whole in RUNS:
+            table.add_row(*await run(blob_dir, size_mb, clients, whole))
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
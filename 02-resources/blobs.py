@@ -0,0 +1,147 @@
+# Large binary resources served in chunks, from memory-mapped files or generators
+
+import base64
+import json
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable
+
+from fastmcp import Client
+from fastmcp.exceptions import NotFoundError
+
+# Bytes per chunk read, and the longest range served by one read
+CHUNK_SIZE = 4 * 1024 * 1024
+MAX_RANGE = 16 * 1024 * 1024
+
+
+class FileBlob:
+    """A local file, memory-mapped for each read.
+
+    Only the pages of the range read are loaded, and the kernel can drop them
+    again, so serving the file never holds more than a range in memory.
+    """
+
+    def __init__(self, path: Path | str, mime_type: str = "application/octet-stream"):
+        self.path = Path(path)
+        self.mime_type = mime_type
+
+    @property
+    def size(self) -> int:
+        return self.path.stat().st_size
+
+    def read(self, offset: int, length: int) -> bytes:
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if offset >= size or length <= 0:
+                return b""
+            # mmap cannot map an empty file, which is handled above
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Only where the platform has madvise, not on Windows
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                return mapped[offset : offset + length]
+
+
+class GeneratorBlob:
+    """Bytes produced on demand, ``size`` of them in total.
+
+    ``produce(offset)`` yields the bytes from ``offset`` on, in pieces of any
+    size. Each read starts a generator at its offset and stops it after the
+    range, nothing is kept between reads.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        produce: Callable[[int], Iterable[bytes]],
+        mime_type: str = "application/octet-stream",
+    ):
+        self.size = size
+        self.produce = produce
+        self.mime_type = mime_type
+
+    def read(self, offset: int, length: int) -> bytes:
+        length = max(0, min(length, self.size - offset))
+        data = bytearray()
+        for piece in self.produce(offset):
+            data += piece[: length - len(data)]
+            if len(data) >= length:
+                break
+        return bytes(data)
+
+
+@dataclass
+class BlobInfo:
+    name: str
+    size: int
+    mime_type: str
+    chunk_size: int
+    chunks: int
+    # Resource URIs of a chunk, and of a range of bytes
+    chunk_uri: str
+    range_uri: str
+
+
+class BlobStore:
+    """Named blobs, read by chunk index or byte range."""
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, max_range: int = MAX_RANGE):
+        self.chunk_size = chunk_size
+        self.max_range = max_range
+        self.bytes_served = 0
+        self._blobs: dict[str, FileBlob | GeneratorBlob] = {}
+
+    def add(self, name: str, blob: FileBlob | GeneratorBlob):
+        self._blobs[name] = blob
+
+    def add_directory(self, directory: Path | str):
+        """Add every file of a directory, named after the file."""
+        for path in Path(directory).iterdir():
+            if path.is_file():
+                self.add(path.name, FileBlob(path))
+
+    def _get(self, name: str) -> FileBlob | GeneratorBlob:
+        blob = self._blobs.get(name)
+        if blob is None:
+            raise NotFoundError(f"Unknown blob: {name!r}")
+        return blob
+
+    def info(self, name: str) -> BlobInfo:
+        blob = self._get(name)
+        size = blob.size
+        return BlobInfo(
+            name=name,
+            size=size,
+            mime_type=blob.mime_type,
+            chunk_size=self.chunk_size,
+            chunks=-(-size // self.chunk_size),
+            chunk_uri=f"blob://{name}/chunks/{{index}}",
+            range_uri=f"blob://{name}/bytes/{{offset}}/{{length}}",
+        )
+
+    def read_range(self, name: str, offset: int, length: int) -> bytes:
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must not be negative")
+        if length > self.max_range:
+            raise ValueError(f"Ranges are at most {self.max_range} bytes")
+        data = self._get(name).read(offset, length)
+        self.bytes_served += len(data)
+        return data
+
+    def read_chunk(self, name: str, index: int) -> bytes:
+        if index < 0:
+            raise ValueError("index must not be negative")
+        return self.read_range(name, index * self.chunk_size, self.chunk_size)
+
+    def stats(self) -> dict:
+        return {"blobs": len(self._blobs), "bytes_served": self.bytes_served}
+
+
+async def stream_blob(client: Client, name: str) -> AsyncIterator[bytes]:
+    """Read a blob chunk by chunk from a server, yielding each chunk decoded."""
+    info = json.loads((await client.read_resource(f"blob://{name}"))[0].text)
+    for index in range(info["chunks"]):
+        contents = await client.read_resource(f"blob://{name}/chunks/{index}")
+        yield base64.b64decode(contents[0].blob)
@@ -0,0 +1,149 @@
+# Client caching resource reads until the server says they changed, or a TTL passes
+
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+import mcp.types
+from fastmcp import Client
+from mcp.shared.exceptions import McpError
+from pydantic import AnyUrl
+
+
+class CachingClient(Client):
+    """A fastmcp Client answering repeated resource reads from memory.
+
+    Entries expire after ``resource_ttl`` seconds. When the server supports
+    resource subscriptions, each cached URI is also subscribed to and dropped
+    as soon as a ``notifications/resources/updated`` for it arrives. The TTL
+    still applies, a server may not notify every change, and URIs whose
+    subscription is refused are not subscribed to again. At most
+    ``max_cached_resources`` URIs are kept,
+    the least recently used ones are dropped and unsubscribed beyond. URIs in
+    ``exclude``, and results over ``max_resource_size`` bytes, are always read
+    from the server.
+
+    ``read_resource`` and ``read_resource_mcp`` are cached, the other methods
+    are those of Client. A ``message_handler`` still receives every message.
+    """
+
+    def __init__(
+        self,
+        *args,
+        resource_ttl: float = 60.0,
+        max_cached_resources: int = 256,
+        max_resource_size: int = 1024 * 1024,
+        exclude: Iterable[str] = (),
+        message_handler=None,
+        **kwargs,
+    ):
+        super().__init__(*args, message_handler=self._on_message, **kwargs)
+        self.resource_ttl = resource_ttl
+        self.max_cached_resources = max_cached_resources
+        self.max_resource_size = max_resource_size
+        self.exclude = set(exclude)
+        self._message_handler = message_handler
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.expirations = 0
+        # URI -> (result, expiry time)
+        self._resources: OrderedDict[
+            str, tuple[mcp.types.ReadResourceResult, float]
+        ] = OrderedDict()
+        self._subscribed: set[str] = set()
+        # Subscriptions refused by the server, at most max_cached_resources
+        self._refused: set[str] = set()
+        # Bumped by notifications, a read that raced one is not cached
+        self._generations: dict[str, int] = {}
+        self._cached_session = None
+
+    async def _on_message(self, message):
+        if isinstance(message, mcp.types.ServerNotification) and isinstance(
+            message.root, mcp.types.ResourceUpdatedNotification
+        ):
+            uri = str(message.root.params.uri)
+            self._generations[uri] = self._generations.get(uri, 0) + 1
+            if self._resources.pop(uri, None) is not None:
+                self.invalidations += 1
+        if self._message_handler is not None:
+            await self._message_handler(message)
+
+    def _server_notifies(self) -> bool:
+        resources = self.initialize_result.capabilities.resources
+        return resources is not None and bool(resources.subscribe)
+
+    async def read_resource_mcp(
+        self, uri: AnyUrl | str
+    ) -> mcp.types.ReadResourceResult:
+        uri = str(uri)
+        if uri in self.exclude:
+            return await super().read_resource_mcp(uri)
+
+        # Subscriptions belong to a session, a reconnected client starts over
+        if self.session is not self._cached_session:
+            self._cached_session = self.session
+            self._resources.clear()
+            self._subscribed.clear()
+            self._refused.clear()
+
+        cached = self._resources.get(uri)
+        if cached is not None:
+            result, expires = cached
+            if expires > time.monotonic():
+                self.hits += 1
+                self._resources.move_to_end(uri)
+                return result
+            self.expirations += 1
+            del self._resources[uri]
+
+        self.misses += 1
+        # Subscribed before reading, a change made meanwhile is not missed
+        if (
+            uri not in self._subscribed
+            and uri not in self._refused
+            and self._server_notifies()
+        ):
+            try:
+                await self.session.subscribe_resource(AnyUrl(uri))
+                self._subscribed.add(uri)
+            except McpError:
+                if len(self._refused) >= self.max_cached_resources:
+                    self._refused.clear()
+                self._refused.add(uri)
+
+        generation = self._generations.get(uri, 0)
+        result = await super().read_resource_mcp(uri)
+        size = sum(
+            len(
+                item.text
+                if isinstance(item, mcp.types.TextResourceContents)
+                else item.blob
+            )
+            for item in result.contents
+        )
+        if size > self.max_resource_size:
+            # Too large to keep, the subscription is of no use
+            if uri in self._subscribed:
+                self._subscribed.discard(uri)
+                await self.session.unsubscribe_resource(AnyUrl(uri))
+            return result
+
+        if self._generations.get(uri, 0) == generation:
+            self._resources[uri] = (result, time.monotonic() + self.resource_ttl)
+            while len(self._resources) > self.max_cached_resources:
+                evicted, _ = self._resources.popitem(last=False)
+                if evicted in self._subscribed:
+                    self._subscribed.discard(evicted)
+                    await self.session.unsubscribe_resource(AnyUrl(evicted))
+        return result
+
+    def resource_cache_stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "expirations": self.expirations,
+            "entries": len(self._resources),
+            "subscriptions": len(self._subscribed),
+        }
@@ -1,16 +1,32 @@
 import asyncio
+import base64
 import os
 
-from fastmcp import Client
+from caching_client import CachingClient
+from mcp.types import ResourceUpdatedNotification, ServerNotification
 from rich.console import Console
 
 console = Console()
 console.clear()
 
 
+async def on_message(message):
+    # Sent by the server when a subscribed resource changes
+    if isinstance(message, ServerNotification) and isinstance(
+        message.root, ResourceUpdatedNotification
+    ):
+        console.print(f"Updated: {message.root.params.uri}", style="bold magenta")
+
+
 async def main():
 
-    async with Client("http://localhost:8000/mcp") as client:
+    # Resource reads are cached until the server notifies a change, except the stats
+    async with CachingClient(
+        "http://localhost:8000/mcp",
+        message_handler=on_message,
+        # Both change with every read
+        exclude=["data://cache/stats", "resource://system-status"],
+    ) as client:
 
         # List all available resources
         all_resources = await client.list_resources()
@@ -30,5 +46,30 @@ async def main():
         resource = await client.read_resource("resource://system-status")
         console.print(resource, style="bold cyan")
 
+        # Cached resources carry the ETag of their contents
+        result = await client.read_resource_mcp("data://config")
+        console.print(result.contents[0].meta, style="bold yellow")
+
+        # Read again from the client cache, the server is not asked
+        result = await client.read_resource_mcp("data://config")
+        console.print(result.contents[0].meta, style="bold yellow")
+
+        # The client subscribed to data://config, the change invalidates its copy
+        await client.call_tool("set_theme", {"theme": "light"})
+        result = await client.read_resource_mcp("data://config")
+        console.print(
+            result.contents[0].text, result.contents[0].meta, style="bold yellow"
+        )
+        console.print(client.resource_cache_stats(), style="bold white")
+
+        # A large blob is read in chunks or byte ranges, never whole
+        resource = await client.read_resource("blob://pattern")
+        console.print(resource[0].text, style="bold green")
+        resource = await client.read_resource("blob://pattern/bytes/1000/16")
+        console.print(base64.b64decode(resource[0].blob), style="bold green")
+
+        resource = await client.read_resource("data://cache/stats")
+        console.print(resource[0].text, style="bold white")
+
 
 asyncio.run(main())
@@ -0,0 +1,175 @@
+# Middleware caching resource reads with ETags, and notifying subscribers of changes
+
+import dataclasses
+import hashlib
+import time
+import weakref
+from collections import OrderedDict
+
+from fastmcp import FastMCP
+from fastmcp.resources.template import match_uri_template
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from mcp import types
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.server.session import ServerSession
+from mcp.shared.exceptions import McpError
+from pydantic import AnyUrl
+
+
+@dataclasses.dataclass
+class CachedRead:
+    contents: list[ReadResourceContents]
+    etag: str
+    expires: float
+
+
+def _etag(contents: list[ReadResourceContents]) -> str:
+    digest = hashlib.sha256()
+    for item in contents:
+        data = item.content
+        digest.update(data.encode() if isinstance(data, str) else data)
+    return digest.hexdigest()[:16]
+
+
+class ResourceCacheMiddleware(Middleware):
+    """Caches resource reads and tells subscribed clients when they change.
+
+    Only the resources and templates listed in ``ttls`` are cached, each for
+    its own number of seconds. Templated URIs are cached per template in an
+    LRU of ``max_template_entries``, keyed by the parameters they expand to.
+    Every read carries the ETag of its contents in ``_meta``, a hash that
+    changes only when the contents do.
+
+    ``register_subscriptions`` lets clients subscribe to the cached resources,
+    the others are refused since no change of theirs would be notified.
+    Subscribers of a URI receive ``notifications/resources/updated`` when it
+    is invalidated, or when it is read again after its TTL with new contents.
+    """
+
+    def __init__(self, ttls: dict[str, float], max_template_entries: int = 256):
+        self.ttls = ttls
+        self.max_template_entries = max_template_entries
+        self.hits = 0
+        self.misses = 0
+        self.changes = 0
+        self.notifications = 0
+        self._static: dict[str, CachedRead] = {}
+        self._templated: dict[str, OrderedDict[tuple, CachedRead]] = {
+            key: OrderedDict() for key in ttls if "{" in key
+        }
+        # Closed sessions drop out of the sets on their own
+        self._subscribers: dict[str, weakref.WeakSet[ServerSession]] = {}
+
+    def _locate(self, uri: str) -> tuple[dict, object, float] | None:
+        """The entries holding a URI, its key among them and its TTL."""
+        if uri in self.ttls and "{" not in uri:
+            return self._static, uri, self.ttls[uri]
+        for template, entries in self._templated.items():
+            if (params := match_uri_template(uri, template)) is not None:
+                return entries, tuple(sorted(params.items())), self.ttls[template]
+        return None
+
+    async def on_read_resource(self, context: MiddlewareContext, call_next: CallNext):
+        uri = str(context.message.uri)
+        located = self._locate(uri)
+        if located is None:
+            return await call_next(context)
+
+        entries, key, ttl = located
+        cached = entries.get(key)
+        if cached is not None and cached.expires > time.monotonic():
+            self.hits += 1
+            if entries is not self._static:
+                entries.move_to_end(key)
+            return cached.contents
+
+        self.misses += 1
+        contents = list(await call_next(context))
+        etag = _etag(contents)
+        # ReadResourceContents has no meta field in mcp 1.14, pyproject.toml pins 1.30
+        contents = [
+            dataclasses.replace(item, meta={**(item.meta or {}), "etag": etag})
+            for item in contents
+        ]
+        entries[key] = CachedRead(contents, etag, time.monotonic() + ttl)
+        if entries is not self._static:
+            entries.move_to_end(key)
+            while len(entries) > self.max_template_entries:
+                entries.popitem(last=False)
+
+        # Expired with new contents, clients holding the old ones are told
+        if cached is not None and cached.etag != etag:
+            self.changes += 1
+            await self.notify(uri)
+        return contents
+
+    async def invalidate(self, uri: str):
+        """Drop the cached contents of a URI that changed, and notify its subscribers."""
+        located = self._locate(uri)
+        if located is not None:
+            entries, key, _ = located
+            entries.pop(key, None)
+        self.changes += 1
+        await self.notify(uri)
+
+    async def notify(self, uri: str):
+        for session in list(self._subscribers.get(uri, ())):
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+                self.notifications += 1
+            except Exception:
+                # The client went away without unsubscribing
+                self._subscribers[uri].discard(session)
+
+    def register_subscriptions(self, server: FastMCP):
+        """Handle resources/subscribe and resources/unsubscribe on a server."""
+        low_level = server._mcp_server
+
+        async def subscribe(uri: AnyUrl):
+            if self._locate(str(uri)) is None:
+                raise McpError(
+                    types.ErrorData(
+                        code=types.INVALID_PARAMS,
+                        message=f"Changes of {uri} are not notified, "
+                        "read it again instead",
+                    )
+                )
+            session = low_level.request_context.session
+            self._subscribers.setdefault(str(uri), weakref.WeakSet()).add(session)
+
+        async def unsubscribe(uri: AnyUrl):
+            subscribers = self._subscribers.get(str(uri))
+            if subscribers is not None:
+                subscribers.discard(low_level.request_context.session)
+                if not subscribers:
+                    del self._subscribers[str(uri)]
+
+        low_level.subscribe_resource()(subscribe)
+        low_level.unsubscribe_resource()(unsubscribe)
+
+        # The low-level server always advertises subscribe=False. Patching its
+        # get_capabilities relies on the internals of the fastmcp 2.12.3 and
+        # mcp 1.30.0 in uv.lock. pyproject.toml keeps them below 2.13 and 1.31,
+        # check it still advertises subscribe=True when raising either bound
+        get_capabilities = low_level.get_capabilities
+
+        def get_capabilities_with_subscribe(
+            *args, **kwargs
+        ) -> types.ServerCapabilities:
+            capabilities = get_capabilities(*args, **kwargs)
+            if capabilities.resources is not None:
+                capabilities.resources.subscribe = True
+            return capabilities
+
+        low_level.get_capabilities = get_capabilities_with_subscribe
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "changes": self.changes,
+            "notifications": self.notifications,
+            "entries": len(self._static)
+            + sum(len(entries) for entries in self._templated.values()),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+        }
@@ -1,10 +1,35 @@
 # A Resource is data (read-only) exposed by the server for the LLM or client application.
 
 
+import asyncio
+import os
+from dataclasses import asdict
+
+from blobs import BlobStore, GeneratorBlob
 from fastmcp import Context, FastMCP
+from resource_cache import ResourceCacheMiddleware
 
 mcp = FastMCP(name="DataServer")
 
+# Seconds each resource is served from the cache, templates are cached per URI.
+# resource://system-status is left out, it changes with every request
+resource_cache = ResourceCacheMiddleware(
+    ttls={
+        "data://config": 300.0,
+        "data://app-status": 5.0,
+        "resource://{name}/details": 60.0,
+    }
+)
+mcp.add_middleware(resource_cache)
+# Clients can subscribe to resources and stop polling them
+resource_cache.register_subscriptions(mcp)
+
+CONFIG = {
+    "theme": "dark",
+    "version": "1.2.0",
+    "features": ["tools", "inspect"],
+}
+
 
 # Basic dynamic resource returning a string
 @mcp.resource("resource://greeting")
@@ -19,11 +44,7 @@ def get_greeting() -> str:
 )
 def get_config() -> dict:
     """Provides application configuration as JSON."""
-    return {
-        "theme": "dark",
-        "version": "1.2.0",
-        "features": ["tools", "inspect"],
-    }
+    return CONFIG
 
 
 # Example specifying metadata
@@ -56,5 +77,62 @@ async def get_name_details(name: str, ctx: Context) -> dict:
     return {"name": name, "accessed_at": ctx.request_id}
 
 
+# Large binary resources, served a chunk or a range at a time
+def _pattern(offset: int):
+    """Yields the bytes offset % 256 from offset on, a generated blob."""
+    block = bytes(range(256)) * 256
+    piece = block[offset % 256 :]
+    while True:
+        yield piece
+        piece = block
+
+
+blobs = BlobStore()
+blobs.add("pattern", GeneratorBlob(64 * 1024 * 1024, _pattern))
+# Files of BLOB_DIR are served memory-mapped, named after the file
+if os.getenv("BLOB_DIR"):
+    blobs.add_directory(os.getenv("BLOB_DIR"))
+
+
+@mcp.resource("blob://{name}", mime_type="application/json")
+def get_blob_info(name: str) -> dict:
+    """Size of a blob and the URIs of its chunks and byte ranges."""
+    return asdict(blobs.info(name))
+
+
+@mcp.resource("blob://{name}/chunks/{index}", mime_type="application/octet-stream")
+async def get_blob_chunk(name: str, index: int) -> bytes:
+    """A chunk of a blob, the last one may be shorter."""
+    return await asyncio.to_thread(blobs.read_chunk, name, index)
+
+
+@mcp.resource(
+    "blob://{name}/bytes/{offset}/{length}", mime_type="application/octet-stream"
+)
+async def get_blob_range(name: str, offset: int, length: int) -> bytes:
+    """Up to length bytes of a blob from offset, empty past its end."""
+    return await asyncio.to_thread(blobs.read_range, name, offset, length)
+
+
+@mcp.resource("data://blobs/stats")
+def get_blob_stats() -> dict:
+    return blobs.stats()
+
+
+# Changing the configuration invalidates its cached copy and notifies subscribers
+@mcp.tool
+async def set_theme(theme: str) -> dict:
+    """Changes the theme of the application configuration."""
+    CONFIG["theme"] = theme
+    await resource_cache.invalidate("data://config")
+    return CONFIG
+
+
+@mcp.resource("data://cache/stats")
+def get_cache_stats() -> dict:
+    """Hits, misses, changes and subscriptions of the resource cache."""
+    return resource_cache.stats()
+
+
 if __name__ == "__main__":
     mcp.run(transport="http", host="localhost", port=8000)
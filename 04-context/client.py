@@ -1,6 +1,6 @@
 import asyncio
 
-from fastmcp import Client
+from caching_client import CachingClient
 from rich.console import Console
 
 console = Console()
@@ -8,11 +8,30 @@ console.clear()
 
 
 async def main():
-    async with Client("http://localhost:8000/mcp") as client:
+    # This server sends no change notifications, resources are cached for 10 seconds
+    async with CachingClient(
+        "http://localhost:8000/mcp",
+        resource_ttl=10.0,
+        exclude=["resource://session-state/stats"],
+    ) as client:
 
         # Call a tool that internally uses Context to read a resource returning the request ID
         result = await client.call_tool("system_health_check")
         console.print(result, style="bold blue")
 
+        # Values accumulate in the state the server keeps for this session
+        for values in ([1, 2, 3], [4, 5]):
+            result = await client.call_tool("accumulate", {"values": values})
+            console.print(result.data, style="bold green")
+
+        stats = await client.read_resource("resource://session-state/stats")
+        console.print(stats[0].text, style="bold yellow")
+
+        # Read twice within the TTL, the second read is answered from the cache
+        for _ in range(2):
+            status = await client.read_resource("resource://system-status")
+            console.print(status[0].text, style="bold cyan")
+        console.print(client.resource_cache_stats(), style="bold white")
+
 
 asyncio.run(main())
@@ -0,0 +1,75 @@
+# In-process reads of the server's own resources, as the objects their functions return
+
+import inspect
+from contextvars import ContextVar
+from typing import Any
+
+from fastmcp import Context
+from fastmcp.exceptions import NotFoundError
+from fastmcp.resources import FunctionResource
+from fastmcp.resources.template import match_uri_template
+from fastmcp.utilities.types import find_kwarg_by_type
+
+# The resources already read during a request, with the id of that request.
+# Not in the context state: every nested Context deep-copies it, memoized
+# values included. Each request runs in its own task, so this stays per request
+_memo: ContextVar[tuple[str, dict[str, Any]] | None] = ContextVar(
+    "local_resources_memo", default=None
+)
+
+
+async def _call(fn, ctx: Context) -> Any:
+    kwargs = {}
+    context_kwarg = find_kwarg_by_type(fn, kwarg_type=Context)
+    if context_kwarg is not None:
+        kwargs[context_kwarg] = ctx
+    result = fn(**kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def _read(ctx: Context, uri: str) -> Any:
+    resource = (await ctx.fastmcp.get_resources()).get(uri)
+    if resource is not None:
+        if not resource.enabled:
+            raise NotFoundError(f"Unknown resource: {uri!r}")
+        if isinstance(resource, FunctionResource):
+            return await _call(resource.fn, ctx)
+        # Text and file resources have no object to skip serializing
+        return await resource.read()
+
+    for key, template in (await ctx.fastmcp.get_resource_templates()).items():
+        if (params := match_uri_template(uri, key)) is not None:
+            if not template.enabled:
+                raise NotFoundError(f"Unknown resource: {uri!r}")
+            # Function templates return their function's result unserialized
+            return await template.read(arguments=params)
+    raise NotFoundError(f"Unknown resource: {uri!r}")
+
+
+async def read_local_resource(ctx: Context, uri: str, memo: bool = True) -> Any:
+    """Read a resource of the server handling the request, without serializing it.
+
+    Function resources and templates are called directly and their return
+    value handed back as is, a dict stays a dict instead of going to JSON and
+    back as with ``ctx.read_resource``. Other resources return their str or
+    bytes content. Unlike ``ctx.read_resource``, the server's middleware does
+    not run.
+
+    Results are memoized for the duration of the request, a resource read
+    several times in one tool call is computed once. The same object is
+    returned each time, callers must not modify it. ``memo=False`` reads the
+    resource again.
+    """
+    current = _memo.get()
+    if current is None or current[0] != ctx.request_id:
+        current = (ctx.request_id, {})
+        _memo.set(current)
+    memoized = current[1]
+    if memo and uri in memoized:
+        return memoized[uri]
+
+    value = await _read(ctx, uri)
+    memoized[uri] = value
+    return value
@@ -1,12 +1,17 @@
 # This server demonstrates the use of Context objects in FastMCP
 
-import json
+import os
 
 from fastmcp import Context, FastMCP
 from fastmcp.server.dependencies import get_context  # Other way to access the context
+from local_resources import read_local_resource
+from session_state import SessionStore
 
 mcp = FastMCP(name="Context-Server")
 
+# State kept by tools across the calls of a session, spilled to disk if configured
+session_store = SessionStore(spill_dir=os.getenv("SESSION_SPILL_DIR"))
+
 
 # Exposes a resource can accesses the context and returns the request ID
 @mcp.resource("resource://system-status")
@@ -19,9 +24,33 @@ async def get_system_status(ctx: Context) -> dict:
 @mcp.tool()
 async def system_health_check(ctx: Context) -> dict:
     """Checks the health of the system."""
-    status_resource = await ctx.read_resource("resource://system-status")
-    content = status_resource[0].content
-    return json.loads(content)
+    # The resource lives on this server, its dict is used as is, no JSON round trip
+    return await read_local_resource(ctx, "resource://system-status")
+
+
+# A tool accumulating values across calls in the state of the client session
+@mcp.tool
+async def accumulate(values: list[float], ctx: Context) -> dict:
+    """Adds values to the running statistics of the session."""
+    state = session_store.session(ctx)
+    totals = state.get_or_create("totals", lambda: {"count": 0, "sum": 0.0})
+    # Evicted totals restart from zero, the caller is told so
+    restarted = state.lost("totals")
+    totals["count"] += len(values)
+    totals["sum"] += sum(values)
+    # Set again after the in-place update, so the store knows its size
+    state.set("totals", totals)
+    return {
+        **totals,
+        "mean": totals["sum"] / max(totals["count"], 1),
+        "restarted": restarted,
+    }
+
+
+@mcp.resource("resource://session-state/stats")
+def get_session_state_stats() -> dict:
+    """Memory used by the session state store, with its hit and eviction counts."""
+    return session_store.stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,256 @@
+# Per-session state for tools, bounded in memory, optionally spilled to disk
+
+import hashlib
+import pickle
+import shutil
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from fastmcp import Context
+
+T = TypeVar("T")
+
+# Tells a missing value from a stored None
+_MISSING = object()
+
+# Dropped idle sessions whose keys are remembered, to report their values lost
+DROPPED_SESSIONS_KEPT = 1024
+
+
+class StateQuotaExceeded(ValueError):
+    """Raised when a single value is larger than the per-session quota."""
+
+
+def _digest(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()[:32]
+
+
+class SessionState:
+    """Values kept by tools for one client session, least recently used first.
+
+    Values are pickled when set to measure their size, which counts against
+    the session's quota. A value mutated in place keeps its old size until
+    it is set again. A value evicted without a spill directory, or whose
+    spill expired, is gone: ``lost(key)`` tells it apart from a key never
+    set. Get it with ``SessionStore.session(ctx)``.
+    """
+
+    def __init__(self, store: "SessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+        self.size = 0
+        self.last_used = time.monotonic()
+        self._values: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        # Keys set and not deleted, wherever their value is
+        self._known: set[str] = set()
+        self._lost: set[str] = set()
+
+    def _spill_dir(self) -> Path | None:
+        if self.store.spill_dir is None:
+            return None
+        return self.store.spill_dir / _digest(self.session_id)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self.last_used = time.monotonic()
+        if key in self._values:
+            self.store.hits += 1
+            self._values.move_to_end(key)
+            return self._values[key][0]
+
+        # Evicted from memory, it may have been spilled to disk
+        spill_dir = self._spill_dir()
+        if spill_dir is not None:
+            path = spill_dir / f"{_digest(key)}.pkl"
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                pass
+            else:
+                path.unlink(missing_ok=True)
+                self.store.loads += 1
+                value = pickle.loads(data)
+                self._put(key, value, len(data))
+                return value
+        if key in self._known:
+            # Evicted without a spill, or its spill expired
+            self._known.discard(key)
+            self._lost.add(key)
+            self.store.lost += 1
+        self.store.misses += 1
+        return default
+
+    def lost(self, key: str) -> bool:
+        """True when the value of ``key`` was evicted and is gone, until set again."""
+        return key in self._lost
+
+    def get_or_create(self, key: str, factory: Callable[[], T]) -> T:
+        """The value of ``key``, set to ``factory()`` if there is none."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        self.last_used = time.monotonic()
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.store.max_session_bytes:
+            raise StateQuotaExceeded(
+                f"{key} is {size} bytes, the session quota is "
+                f"{self.store.max_session_bytes}"
+            )
+        self._put(key, value, size)
+        self._known.add(key)
+        self._lost.discard(key)
+
+    def _put(self, key: str, value: Any, size: int):
+        self._remove(key)
+        self._values[key] = (value, size)
+        self.size += size
+        self.store.size += size
+        # The least recently used values make room, spilled if possible
+        while self.size > self.store.max_session_bytes:
+            oldest = next(iter(self._values))
+            self._evict(oldest)
+            self.store.evictions += 1
+        self.store._enforce_total()
+
+    def _remove(self, key: str) -> Any:
+        value, size = self._values.pop(key, (None, 0))
+        self.size -= size
+        self.store.size -= size
+        return value
+
+    def _evict(self, key: str):
+        value = self._remove(key)
+        spill_dir = self._spill_dir()
+        if spill_dir is not None:
+            spill_dir.mkdir(parents=True, exist_ok=True)
+            (spill_dir / f"{_digest(key)}.pkl").write_bytes(
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+            self.store.spills += 1
+
+    def delete(self, key: str):
+        self._remove(key)
+        self._known.discard(key)
+        self._lost.discard(key)
+        spill_dir = self._spill_dir()
+        if spill_dir is not None:
+            (spill_dir / f"{_digest(key)}.pkl").unlink(missing_ok=True)
+
+    def evict_all(self):
+        """Move every value out of memory, to disk if spilling is enabled."""
+        for key in list(self._values):
+            self._evict(key)
+
+    def clear(self):
+        """Forget every value of the session, in memory and on disk."""
+        for key in list(self._values):
+            self._remove(key)
+        self._known.clear()
+        self._lost.clear()
+        spill_dir = self._spill_dir()
+        if spill_dir is not None:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class SessionStore:
+    """The SessionState of every client session, bounded in memory.
+
+    Each session holds at most ``max_session_bytes`` and all of them
+    ``max_total_bytes``, the least recently used values and sessions are
+    evicted beyond. Sessions idle for ``idle_timeout`` seconds are evicted
+    too. With a ``spill_dir``, evicted values are written there and read back
+    on next use, and left there at most ``spill_ttl`` seconds. Values that
+    could not be read back are counted as ``lost``.
+    """
+
+    def __init__(
+        self,
+        max_session_bytes: int = 10 * 1024 * 1024,
+        max_total_bytes: int = 256 * 1024 * 1024,
+        idle_timeout: float = 1800.0,
+        spill_dir: Path | str | None = None,
+        spill_ttl: float = 24 * 3600,
+    ):
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        self.idle_timeout = idle_timeout
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.spill_ttl = spill_ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.idle_evictions = 0
+        self.spills = 0
+        self.loads = 0
+        self.lost = 0
+        self._sessions: OrderedDict[str, SessionState] = OrderedDict()
+        # The keys of the last idle sessions dropped
+        self._dropped: OrderedDict[str, set[str]] = OrderedDict()
+        self._last_sweep = time.monotonic()
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+    def session(self, ctx: Context) -> SessionState:
+        """The state of the client session making the request."""
+        self._sweep()
+        state = self._sessions.get(ctx.session_id)
+        if state is None:
+            state = self._sessions[ctx.session_id] = SessionState(self, ctx.session_id)
+            state._known = self._dropped.pop(ctx.session_id, set())
+        self._sessions.move_to_end(ctx.session_id)
+        return state
+
+    def _enforce_total(self):
+        # Whole sessions are evicted, least recently used first
+        for state in list(self._sessions.values()):
+            if self.size <= self.max_total_bytes:
+                break
+            self.evictions += len(state)
+            state.evict_all()
+
+    def _sweep(self):
+        # At most once a minute, sessions are not checked on every access
+        now = time.monotonic()
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+
+        for session_id, state in list(self._sessions.items()):
+            if now - state.last_used < self.idle_timeout:
+                # Ordered by last use, the following ones are more recent
+                break
+            self.idle_evictions += 1
+            state.evict_all()
+            del self._sessions[session_id]
+            self._dropped[session_id] = state._known
+            if len(self._dropped) > DROPPED_SESSIONS_KEPT:
+                self._dropped.popitem(last=False)
+
+        if self.spill_dir is not None:
+            expired = time.time() - self.spill_ttl
+            for spilled in self.spill_dir.iterdir():
+                if spilled.stat().st_mtime < expired:
+                    shutil.rmtree(spilled, ignore_errors=True)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self.size,
+            "entries": sum(len(state) for state in self._sessions.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "idle_evictions": self.idle_evictions,
+            "spills": self.spills,
+            "loads": self.loads,
+            "lost": self.lost,
+        }
@@ -0,0 +1,109 @@
+# Compares analyze_data on 10^6 values: the former pure-Python mean against the NumPy engine
+# Runs the servers in memory, so it measures serialization and compute, not the network
+
+import asyncio
+import random
+import statistics
+import time
+
+from fastmcp import Client, FastMCP
+from rich.console import Console
+from rich.table import Table
+from server import mcp
+from stats import describe, encode_series
+
+SIZE = 1_000_000
+RUNS = 5
+
+console = Console()
+
+# The previous implementation, kept as the baseline
+legacy = FastMCP("LegacyLogging")
+
+
+@legacy.tool
+async def analyze_data(data: list[float]) -> dict:
+    result = sum(data) / len(data)
+    return {"average": result, "count": len(data)}
+
+
+def python_stats(data: list[float]) -> dict:
+    """The same statistics as describe, written in pure Python."""
+    mean = statistics.fmean(data)
+    ordered = sorted(data)
+    low, high = ordered[0], ordered[-1]
+    width = (high - low) / 10
+    counts = [0] * 10
+    for value in data:
+        counts[min(int((value - low) / width), 9)] += 1
+    return {
+        "mean": mean,
+        "variance": statistics.pvariance(data, mean),
+        "percentiles": statistics.quantiles(ordered, n=100),
+        "histogram": counts,
+    }
+
+
+async def ignore_logs(message):
+    pass
+
+
+def timed(function) -> list[float]:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def timed_call(client: Client, arguments: dict) -> list[float]:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        await client.call_tool("analyze_data", arguments)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def add_row(table: Table, label: str, timings: list[float]):
+    table.add_row(label, f"{statistics.mean(timings):.1f}", f"{min(timings):.1f}")
+
+
+async def main():
+    rng = random.Random(42)
+    data = [rng.gauss(100, 15) for _ in range(SIZE)]
+    encoded = encode_series(data)
+
+    compute = Table(title=f"Statistics over {SIZE:,} values, compute only")
+    for column in ("implementation", "mean ms", "min ms"):
+        compute.add_column(column)
+    add_row(compute, "pure Python, mean only", timed(lambda: sum(data) / len(data)))
+    add_row(compute, "pure Python, all statistics", timed(lambda: python_stats(data)))
+    add_row(compute, "NumPy, all statistics", timed(lambda: describe(data)))
+
+    end_to_end = Table(title=f"analyze_data over {SIZE:,} values, in-memory client")
+    for column in ("call", "mean ms", "min ms"):
+        end_to_end.add_column(column)
+    async with Client(legacy) as client:
+        add_row(
+            end_to_end,
+            "before: JSON list, mean only",
+            await timed_call(client, {"data": data}),
+        )
+    async with Client(mcp, log_handler=ignore_logs) as client:
+        add_row(
+            end_to_end, "NumPy: JSON list", await timed_call(client, {"data": data})
+        )
+        add_row(
+            end_to_end,
+            "NumPy: base64 float64",
+            await timed_call(client, {"encoded": encoded}),
+        )
+
+    console.print(compute)
+    console.print(end_to_end)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,6 +4,7 @@ import logging
 from fastmcp import Client
 from fastmcp.client.logging import LogMessage
 from rich.console import Console
+from stats import encode_series
 
 # Get a logger for the module where the client is used
 logger = logging.getLogger(__name__)
@@ -33,14 +34,48 @@ async def log_handler(message: LogMessage):
     )
 
 
+async def progress_handler(progress: float, total: float | None, message: str | None):
+    console.print(f"[bold green]PROGRESS[/bold green] {message}")
+
+
 async def main():
     # Create the client with the custom log handler that will collect logs from the server
-    async with Client("http://localhost:8000/mcp", log_handler=log_handler) as client:
+    async with Client(
+        "http://localhost:8000/mcp",
+        log_handler=log_handler,
+        progress_handler=progress_handler,
+    ) as client:
 
         # Call the tool, generated logs will be forwarded to the log_handler
         result = await client.call_tool("analyze_data", {"data": [1, 2, 3, 4, 5]})
         console.print("\nResponse from the tool:", style="bold blue")
         console.print(result, style="bold magenta")
 
+        # Large arrays are cheaper to send as base64 float64 than as a JSON list
+        series = [[float(i) for i in range(1000)], [0.5, 1.5, 2.5]]
+        result = await client.call_tool(
+            "analyze_batch", {"encoded": [encode_series(s) for s in series]}
+        )
+        console.print("\nResponse from the batch tool:", style="bold blue")
+        console.print(result.data, style="bold magenta")
+
+        # Data too large for one request is streamed in chunks to a running analysis
+        for start in range(0, 30_000, 10_000):
+            chunk = [float(i % 97) for i in range(start, start + 10_000)]
+            await client.call_tool(
+                "stream_data",
+                {"encoded": encode_series(chunk), "expected_count": 30_000},
+            )
+        result = await client.call_tool("finish_stream", {})
+        console.print("\nResponse from the streamed analysis:", style="bold blue")
+        console.print(result.data, style="bold magenta")
+
+        # Or the server reads the values from a resource, one page at a time
+        result = await client.call_tool(
+            "analyze_resource", {"uri": "data://samples/1000000/chunks/{index}"}
+        )
+        console.print("\nResponse from the resource analysis:", style="bold blue")
+        console.print(result.data, style="bold magenta")
+
 
 asyncio.run(main())
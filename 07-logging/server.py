@@ -1,4 +1,12 @@
+import time
+from dataclasses import asdict, dataclass
+from typing import Annotated, AsyncIterator
+
+import numpy as np
 from fastmcp import Context, FastMCP
+from fastmcp.exceptions import ToolError
+from pydantic import Field
+from stats import SeriesStats, StreamingStats, decode_series, describe
 
 mcp = FastMCP("Logging Server")
 
@@ -8,25 +16,320 @@ from fastmcp import Context, FastMCP
 mcp = FastMCP("LoggingDemo")
 
 
+# Upper bound on the streams open at once, each holds a bounded digest
+MAX_STREAMS = 64
+# Streams one client session may keep open
+MAX_STREAMS_PER_SESSION = 8
+# Streams not fed for this long are discarded
+STREAM_IDLE_SECONDS = 600.0
+
+# Largest sample resource read whole, and read page by page
+MAX_SAMPLES = 1_000_000
+MAX_PAGED_SAMPLES = 100_000_000
+# Values per page of data://samples/{count}/chunks/{index}
+SAMPLE_CHUNK = 100_000
+
+
+@dataclass
+class OpenStream:
+    stats: StreamingStats
+    last_used: float
+
+
+# Running statistics fed by stream_data, keyed by client session and stream name
+streams: dict[tuple[str, str], OpenStream] = {}
+# Sessions whose streams are dropped when they close
+watched_sessions: set[str] = set()
+
+Bins = Annotated[int, Field(description="Number of histogram bins", ge=1, le=1000)]
+
+
+async def _describe(values, bins: int, ctx: Context) -> SeriesStats:
+    try:
+        return describe(values, bins=bins)
+    except ValueError as e:
+        await ctx.warning(str(e))
+        raise ToolError(str(e))
+
+
 # Tool with various logging levels (where are these logs visible?)
 @mcp.tool
-async def analyze_data(data: list[float], ctx: Context) -> dict:
-    """Analyze numerical data with comprehensive logging."""
+async def analyze_data(
+    ctx: Context,
+    data: Annotated[
+        list[float] | None, Field(description="The values to analyze")
+    ] = None,
+    encoded: Annotated[
+        str | None,
+        Field(
+            description="The values as a base64 buffer of little-endian float64, "
+            "faster than a JSON list for large arrays"
+        ),
+    ] = None,
+    bins: Bins = 10,
+) -> dict:
+    """Analyze numerical data with comprehensive logging.
+
+    Returns the average and count, along with the variance, min/max,
+    percentiles and a histogram.
+    """
     await ctx.debug("Starting analysis of numerical data")
-    await ctx.info(f"Analyzing {len(data)} data points")
+    if (data is None) == (encoded is None):
+        raise ToolError("Provide exactly one of data or encoded")
+
+    try:
+        values = data if encoded is None else decode_series(encoded)
+    except ValueError as e:
+        await ctx.error(f"Analysis failed: {str(e)}")
+        raise ToolError(str(e))
+
+    await ctx.info(f"Analyzing {len(values)} data points")
+    if len(values) == 0:
+        await ctx.warning("Empty data list provided")
+        return {"error": "Empty data list"}
+
+    result = await _describe(values, bins, ctx)
+    await ctx.info(f"Analysis complete, average: {result.mean}")
+    # Keeps the average and count keys the tool has always returned
+    return {"average": result.mean, **asdict(result)}
+
+
+@mcp.tool
+async def analyze_batch(
+    ctx: Context,
+    series: Annotated[
+        list[list[float]] | None, Field(description="The series to analyze")
+    ] = None,
+    encoded: Annotated[
+        list[str] | None,
+        Field(description="The series as base64 buffers of little-endian float64"),
+    ] = None,
+    bins: Bins = 10,
+) -> list[SeriesStats]:
+    """Analyze several numerical series in a single call, one result per series."""
+    if (series is None) == (encoded is None):
+        raise ToolError("Provide exactly one of series or encoded")
 
     try:
-        if not data:
-            await ctx.warning("Empty data list provided")
-            return {"error": "Empty data list"}
+        batch = series if encoded is None else [decode_series(e) for e in encoded]
+    except ValueError as e:
+        await ctx.error(f"Analysis failed: {str(e)}")
+        raise ToolError(str(e))
+
+    await ctx.info(f"Analyzing a batch of {len(batch)} series")
+    results = [await _describe(values, bins, ctx) for values in batch]
+    await ctx.info("Batch analysis complete")
+    return results
+
+
+def _drop_streams(session_id: str):
+    watched_sessions.discard(session_id)
+    for key in [key for key in streams if key[0] == session_id]:
+        del streams[key]
+
+
+def _watch_session(ctx: Context):
+    """Drop the streams of the session when it closes."""
+    if ctx.session_id in watched_sessions:
+        return
+    watched_sessions.add(ctx.session_id)
+    # Relies on the _exit_stack of mcp's BaseSession, closed when the session
+    # ends, there is no public hook for a client disconnecting. Checked with the
+    # mcp 1.30.0 in uv.lock, pyproject.toml keeps mcp below 1.31
+    ctx.session._exit_stack.callback(_drop_streams, ctx.session_id)
+
+
+def _expire_idle_streams():
+    deadline = time.monotonic() - STREAM_IDLE_SECONDS
+    for key in [key for key, entry in streams.items() if entry.last_used < deadline]:
+        del streams[key]
+
 
-        result = sum(data) / len(data)
-        await ctx.info(f"Analysis complete, average: {result}")
-        return {"average": result, "count": len(data)}
+async def _report(accumulator: StreamingStats, total: int | None, ctx: Context):
+    await ctx.report_progress(
+        progress=accumulator.count,
+        total=total,
+        message=f"{accumulator.count} values, running mean {accumulator.mean:.6g}",
+    )
 
-    except Exception as e:
+
+@mcp.tool
+async def stream_data(
+    ctx: Context,
+    chunk: Annotated[
+        list[float] | None, Field(description="The next values of the stream")
+    ] = None,
+    encoded: Annotated[
+        str | None,
+        Field(description="The next values as base64 little-endian float64"),
+    ] = None,
+    stream: Annotated[
+        str, Field(description="Name of the stream, to feed several at once")
+    ] = "default",
+    expected_count: Annotated[
+        int | None, Field(description="Total number of values, for progress")
+    ] = None,
+) -> dict:
+    """Add a chunk of values to a running analysis kept for this session.
+
+    Call finish_stream to get the statistics of all the chunks received.
+    """
+    if (chunk is None) == (encoded is None):
+        raise ToolError("Provide exactly one of chunk or encoded")
+
+    _expire_idle_streams()
+    key = (ctx.session_id, stream)
+    if key not in streams:
+        if len(streams) >= MAX_STREAMS:
+            await ctx.warning("Too many open streams")
+            raise ToolError("Too many open streams, finish some first")
+        if (
+            sum(1 for session_id, _ in streams if session_id == ctx.session_id)
+            >= MAX_STREAMS_PER_SESSION
+        ):
+            await ctx.warning("Too many open streams in this session")
+            raise ToolError(
+                f"At most {MAX_STREAMS_PER_SESSION} streams per session, "
+                "finish some first"
+            )
+
+    try:
+        values = chunk if encoded is None else decode_series(encoded)
+        if key not in streams:
+            _watch_session(ctx)
+            streams[key] = OpenStream(StreamingStats(), time.monotonic())
+        open_stream = streams[key]
+        open_stream.last_used = time.monotonic()
+        accumulator = open_stream.stats
+        accumulator.add(values)
+    except ValueError as e:
         await ctx.error(f"Analysis failed: {str(e)}")
-        raise
+        raise ToolError(str(e))
+
+    await ctx.debug(f"Stream '{stream}' received {len(values)} values")
+    await _report(accumulator, expected_count, ctx)
+    return {"stream": stream, "count": accumulator.count, "mean": accumulator.mean}
+
+
+@mcp.tool
+async def finish_stream(
+    ctx: Context,
+    stream: Annotated[str, Field(description="Name of the stream")] = "default",
+    bins: Bins = 10,
+) -> SeriesStats:
+    """Return the statistics of a stream and discard it.
+
+    Percentiles and histogram counts are approximated in bounded memory.
+    """
+    open_stream = streams.pop((ctx.session_id, stream), None)
+    if open_stream is None:
+        raise ToolError(f"Unknown stream: {stream}")
+    accumulator = open_stream.stats
+
+    await ctx.info(f"Stream '{stream}' complete with {accumulator.count} values")
+    try:
+        return accumulator.result(bins=bins)
+    except ValueError as e:
+        await ctx.warning(str(e))
+        raise ToolError(str(e))
+
+
+def _parse_values(content: str | bytes) -> np.ndarray:
+    if isinstance(content, bytes):
+        return np.frombuffer(content, dtype="<f8")
+    return np.array(content.replace(",", " ").split(), dtype=float)
+
+
+async def _read_values(uri: str, ctx: Context) -> AsyncIterator[np.ndarray]:
+    """The values of a resource, one content item or page at a time."""
+    paged = "{index}" in uri
+    index = 0
+    while True:
+        page = uri.replace("{index}", str(index))
+        try:
+            contents = await ctx.read_resource(page)
+        except Exception as e:
+            await ctx.error(f"Analysis failed: {str(e)}")
+            raise ToolError(f"Cannot read values from {page}: {e}")
+
+        empty = True
+        for content in contents:
+            try:
+                values = _parse_values(content.content)
+            except ValueError as e:
+                await ctx.error(f"Analysis failed: {str(e)}")
+                raise ToolError(f"Cannot read values from {page}: {e}")
+            empty = empty and values.size == 0
+            yield values
+        if not paged or empty:
+            return
+        index += 1
+
+
+@mcp.tool
+async def analyze_resource(
+    ctx: Context,
+    uri: Annotated[
+        str,
+        Field(
+            description="Resource holding float64 values, binary or as "
+            "whitespace/comma separated text. A URI with an {index} placeholder "
+            "is read page by page from index 0 until an empty page"
+        ),
+    ],
+    chunk_size: Annotated[
+        int, Field(description="Values analyzed between progress reports", ge=1)
+    ] = 100_000,
+    bins: Bins = 10,
+) -> SeriesStats:
+    """Analyze the values of a resource chunk by chunk, reporting progress.
+
+    Only one page of a paged resource is held in memory at a time.
+    """
+    await ctx.info(f"Reading {uri}")
+    accumulator = StreamingStats()
+    try:
+        async for values in _read_values(uri, ctx):
+            for start in range(0, values.size, chunk_size):
+                accumulator.add(values[start : start + chunk_size])
+                await _report(accumulator, None, ctx)
+        result = accumulator.result(bins=bins)
+    except ValueError as e:
+        await ctx.warning(str(e))
+        raise ToolError(str(e))
+
+    await ctx.info(f"Analysis complete, average: {result.mean}")
+    return result
+
+
+def _sample_chunk(count: int, index: int) -> bytes:
+    start = index * SAMPLE_CHUNK
+    size = max(0, min(SAMPLE_CHUNK, count - start))
+    rng = np.random.default_rng([count, index])
+    return rng.normal(100, 15, size).astype("<f8").tobytes()
+
+
+@mcp.resource("data://samples/{count}", mime_type="application/octet-stream")
+def sample_data(
+    count: Annotated[int, Field(description="Number of values", ge=0, le=MAX_SAMPLES)],
+) -> bytes:
+    """Reproducible normally distributed values, as little-endian float64."""
+    return b"".join(
+        _sample_chunk(count, index) for index in range(-(-count // SAMPLE_CHUNK))
+    )
+
+
+@mcp.resource(
+    "data://samples/{count}/chunks/{index}", mime_type="application/octet-stream"
+)
+def sample_data_chunk(
+    count: Annotated[
+        int, Field(description="Number of values", ge=0, le=MAX_PAGED_SAMPLES)
+    ],
+    index: Annotated[int, Field(description="Page number", ge=0)],
+) -> bytes:
+    """One page of data://samples/{count}, empty past the last one."""
+    return _sample_chunk(count, index)
 
 
 if __name__ == "__main__":
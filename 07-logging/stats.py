@@ -0,0 +1,181 @@
+# Vectorized descriptive statistics for analyze_data, backed by NumPy
+
+import base64
+import binascii
+from dataclasses import dataclass
+
+import numpy as np
+
+# Must match the fields of Percentiles
+PERCENTILES = (5, 25, 50, 75, 95, 99)
+
+
+@dataclass
+class Percentiles:
+    p5: float
+    p25: float
+    p50: float
+    p75: float
+    p95: float
+    p99: float
+
+
+@dataclass
+class Histogram:
+    edges: list[float]
+    counts: list[int]
+
+
+@dataclass
+class SeriesStats:
+    count: int
+    mean: float
+    variance: float
+    std: float
+    min: float
+    max: float
+    percentiles: Percentiles
+    histogram: Histogram
+
+
+def decode_series(encoded: str) -> np.ndarray:
+    """Decode a base64 buffer of little-endian float64, NumPy views the bytes in place."""
+    try:
+        raw = base64.b64decode(encoded, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 data: {e}") from e
+    if len(raw) % 8:
+        raise ValueError("Encoded data length is not a multiple of 8 bytes (float64)")
+    return np.frombuffer(raw, dtype="<f8")
+
+
+def encode_series(values) -> str:
+    """Inverse of decode_series, for clients sending large arrays."""
+    return base64.b64encode(np.asarray(values, dtype="<f8").tobytes()).decode()
+
+
+def describe(values: np.ndarray, bins: int = 10) -> SeriesStats:
+    """Compute every statistic of a non-empty series in vectorized passes."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        raise ValueError("Empty data list")
+    if not np.isfinite(values).all():
+        raise ValueError("Data contains NaN or infinite values")
+
+    mean = values.mean()
+    # Reuse the mean instead of letting np.var compute it a second time
+    deviations = values - mean
+    variance = np.dot(deviations, deviations) / values.size
+    low, high = values.min(), values.max()
+
+    # A single partition-based call for all the percentiles
+    percentiles = np.percentile(values, PERCENTILES)
+    counts, edges = np.histogram(values, bins=bins, range=(low, high))
+
+    return SeriesStats(
+        count=int(values.size),
+        mean=float(mean),
+        variance=float(variance),
+        std=float(np.sqrt(variance)),
+        min=float(low),
+        max=float(high),
+        percentiles=Percentiles(*percentiles.tolist()),
+        histogram=Histogram(edges=edges.tolist(), counts=counts.tolist()),
+    )
+
+
+class StreamingStats:
+    """Online statistics over a series fed in chunks, in bounded memory.
+
+    Mean and variance are merged chunk by chunk with Welford's parallel update,
+    so they stay exact. Percentiles and the histogram come from a merging
+    t-digest of at most ``compression`` centroids and are approximate, most
+    accurate in the tails.
+    """
+
+    def __init__(self, compression: int = 500):
+        self.compression = compression
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        if not np.isfinite(values).all():
+            raise ValueError("Data contains NaN or infinite values")
+
+        # Combine the chunk's own mean and M2 with the running ones
+        chunk_mean = values.mean()
+        deviations = values - chunk_mean
+        chunk_m2 = np.dot(deviations, deviations)
+        count = self.count + values.size
+        delta = chunk_mean - self.mean
+        self.mean += delta * values.size / count
+        self._m2 += chunk_m2 + delta * delta * self.count * values.size / count
+        self.count = count
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        self._compress(
+            np.concatenate((self._means, values)),
+            np.concatenate((self._weights, np.ones(values.size))),
+        )
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        # Map each centroid's quantile onto the arcsine scale, which leaves
+        # more, smaller centroids in the tails, and merge those sharing a unit
+        quantiles = (np.cumsum(weights) - weights / 2) / weights.sum()
+        scale = self.compression * (np.arcsin(2 * quantiles - 1) / np.pi + 0.5)
+        groups = np.floor(scale).astype(np.intp)
+
+        totals = np.bincount(groups, weights=weights)
+        sums = np.bincount(groups, weights=means * weights)
+        used = totals > 0
+        self._weights = totals[used]
+        self._means = sums[used] / self._weights
+
+    def _cdf_points(self) -> tuple[np.ndarray, np.ndarray]:
+        """Centroid means with their cumulative quantiles, anchored at min and max."""
+        quantiles = (np.cumsum(self._weights) - self._weights / 2) / self.count
+        return (
+            np.concatenate(([self.min], self._means, [self.max])),
+            np.concatenate(([0.0], quantiles, [1.0])),
+        )
+
+    def result(self, bins: int = 10) -> SeriesStats:
+        if self.count == 0:
+            raise ValueError("Empty data list")
+
+        points, quantiles = self._cdf_points()
+        percentiles = np.interp(np.array(PERCENTILES) / 100, quantiles, points)
+
+        # Histogram counts estimated from the digest's cumulative distribution
+        low, high = (
+            (self.min, self.max)
+            if self.min < self.max
+            else (self.min - 0.5, self.max + 0.5)
+        )
+        edges = np.linspace(low, high, bins + 1)
+        cumulative = np.rint(np.interp(edges, points, quantiles) * self.count)
+        counts = np.diff(cumulative).astype(np.int64)
+
+        variance = self._m2 / self.count
+        return SeriesStats(
+            count=self.count,
+            mean=float(self.mean),
+            variance=float(variance),
+            std=float(np.sqrt(variance)),
+            min=float(self.min),
+            max=float(self.max),
+            percentiles=Percentiles(*percentiles.tolist()),
+            histogram=Histogram(edges=edges.tolist(), counts=counts.tolist()),
+        )
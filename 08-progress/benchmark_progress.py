@@ -0,0 +1,69 @@
+# Measures progress notifications per call and their latency cost, with and without throttling
+# Serves process_items over HTTP from this process, so notifications cross a real transport
+
+import asyncio
+import time
+
+import server
+from fastmcp import Client
+from rich.console import Console
+from rich.table import Table
+
+PORT = 8765
+ITEMS = (1_000, 10_000, 50_000)
+
+console = Console()
+
+
+class Counter:
+    def __init__(self):
+        self.notifications = 0
+
+    async def __call__(self, progress: float, total: float | None, message: str | None):
+        self.notifications += 1
+
+
+async def run(client: Client, counter: Counter, count: int) -> tuple[float, int]:
+    counter.notifications = 0
+    start = time.perf_counter()
+    await client.call_tool("process_items", {"items": ["x"] * count, "workers": 64})
+    return time.perf_counter() - start, counter.notifications
+
+
+async def main():
+    # No simulated I/O, so the notifications dominate the call
+    server.ITEM_DELAY = 0
+    server_task = asyncio.create_task(
+        server.mcp.run_http_async(show_banner=False, port=PORT, log_level="critical")
+    )
+    await asyncio.sleep(1)
+
+    table = Table(title="process_items over HTTP, no simulated I/O")
+    for column in ("items", "progress", "notifications", "notifications/s", "seconds"):
+        table.add_column(column)
+
+    counter = Counter()
+    async with Client(
+        f"http://localhost:{PORT}/mcp", progress_handler=counter
+    ) as client:
+        for count in ITEMS:
+            for label, interval, delta in (
+                ("every item", 0, 0),
+                ("throttled", 0.1, 0.01),
+            ):
+                server.PROGRESS_INTERVAL, server.PROGRESS_DELTA = interval, delta
+                elapsed, notifications = await run(client, counter, count)
+                table.add_row(
+                    f"{count:,}",
+                    label,
+                    f"{notifications:,}",
+                    f"{notifications / elapsed:,.0f}",
+                    f"{elapsed:.2f}",
+                )
+
+    server_task.cancel()
+    console.print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+# Measures process_items throughput as the worker limit grows, and the CPU-bound
+# transform inline, in a thread pool and in a process pool
+
+import asyncio
+import hashlib
+import os
+import time
+
+import server
+from fastmcp import Client
+from rich.console import Console
+from rich.table import Table
+from workers import map_ordered, run_in_executor
+
+ITEMS = 200
+ITEM_DELAY = 0.02
+WORKERS = (1, 2, 4, 8, 16, 32, 64)
+CPU_ITEMS = 64
+
+console = Console()
+
+
+def hash_item(item: str) -> str:
+    """A CPU-bound transform, about 10 ms of key derivation per item."""
+    return hashlib.pbkdf2_hmac("sha256", item.encode(), b"salt", 20_000).hex()
+
+
+async def io_bound(table: Table):
+    # Shorter simulated I/O than the demo so the sequential run stays quick
+    server.ITEM_DELAY = ITEM_DELAY
+    items = [f"item-{i}" for i in range(ITEMS)]
+
+    async with Client(server.mcp) as client:
+        for workers in WORKERS:
+            start = time.perf_counter()
+            await client.call_tool(
+                "process_items", {"items": items, "workers": workers}
+            )
+            elapsed = time.perf_counter() - start
+            table.add_row(str(workers), f"{elapsed:.2f}", f"{ITEMS / elapsed:.0f}")
+
+
+async def cpu_bound(table: Table):
+    items = [f"item-{i}" for i in range(CPU_ITEMS)]
+    workers = os.cpu_count()
+
+    for executor in (None, "thread", "process"):
+
+        async def process(item: str) -> str:
+            return await run_in_executor(executor, hash_item, item)
+
+        # Warm the pool up so worker startup is not timed
+        await map_ordered(process, items[:workers], workers)
+
+        start = time.perf_counter()
+        await map_ordered(process, items, workers)
+        elapsed = time.perf_counter() - start
+        table.add_row(
+            executor or "inline", f"{elapsed:.2f}", f"{CPU_ITEMS / elapsed:.0f}"
+        )
+
+
+async def main():
+    io_table = Table(
+        title=f"process_items, {ITEMS} items of {ITEM_DELAY * 1000:.0f} ms I/O"
+    )
+    for column in ("workers", "seconds", "items/s"):
+        io_table.add_column(column)
+    await io_bound(io_table)
+
+    cpu_table = Table(
+        title=f"CPU-bound transform, {CPU_ITEMS} items, {os.cpu_count()} workers"
+    )
+    for column in ("executor", "seconds", "items/s"):
+        cpu_table.add_column(column)
+    await cpu_bound(cpu_table)
+
+    console.print(io_table)
+    console.print(cpu_table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
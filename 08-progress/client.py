@@ -2,6 +2,7 @@ import asyncio
 
 from fastmcp import Client
 from rich.console import Console
+from tool_stream import ToolStream
 
 console = Console()
 console.clear()
@@ -26,9 +27,21 @@ async def main():
         # simple action
         console.print("Calling process_items tool...\n", style="bold green")
         result = await client.call_tool(
-            "process_items", {"items": ["hi", "how", "are", "you", "?"]}
+            "process_items",
+            {"items": ["hi", "how", "are", "you", "?"], "workers": 2},
         )
         console.print(result, style="bold magenta")
 
+        # Streaming action: results arrive in chunks while the tool is still running
+        console.print("\nStreaming process_items results...\n", style="bold green")
+        stream = ToolStream(
+            client,
+            "process_items",
+            {"items": [f"item {i}" for i in range(20)], "stream_results": True},
+        )
+        async for chunk in stream:
+            console.print(f"Partial results: {chunk}", style="bold cyan")
+        console.print(stream.result.data, style="bold magenta")
+
 
 asyncio.run(main())
@@ -3,29 +3,73 @@
 
 
 import asyncio
+from typing import Annotated
 
 from fastmcp import Context, FastMCP
+from progress import ResultStream, ThrottledProgress
+from pydantic import Field
+from workers import ExecutorKind, map_ordered, run_in_executor
 
 mcp = FastMCP("ProgressDemo")
 
+# Simulated I/O time spent on each item
+ITEM_DELAY = 0.5
+
+# At most 10 progress notifications per second, each at least 1% apart
+PROGRESS_INTERVAL = 0.1
+PROGRESS_DELTA = 0.01
+
+
+def transform(item: str) -> str:
+    """CPU-bound part of processing an item, safe to run in a thread or process."""
+    return item.upper()
+
 
 @mcp.tool
-async def process_items(items: list[str], ctx: Context) -> dict:
+async def process_items(
+    items: list[str],
+    ctx: Context,
+    workers: Annotated[
+        int, Field(description="Items processed concurrently", ge=1, le=64)
+    ] = 4,
+    executor: Annotated[
+        ExecutorKind | None,
+        Field(description="Pool running the CPU-bound transform, inline if unset"),
+    ] = None,
+    stream_results: Annotated[
+        bool,
+        Field(
+            description="Also send results in chunks, as they complete, "
+            "through progress notifications"
+        ),
+    ] = False,
+) -> dict:
     """Process a list of items with progress updates."""
     total = len(items)
-    results = []
-
-    for i, item in enumerate(items):
-        # Report progress as we process each item
-        await ctx.report_progress(progress=i, total=total)
 
+    async def process(item: str) -> str:
         # Simulate processing time
-        await asyncio.sleep(0.5)
-        results.append(item.upper())
+        await asyncio.sleep(ITEM_DELAY)
+        return await run_in_executor(executor, transform, item)
+
+    async with ThrottledProgress(
+        ctx, total, min_interval=PROGRESS_INTERVAL, min_delta=PROGRESS_DELTA
+    ) as progress:
+        partial = ResultStream(progress) if stream_results else None
+
+        async def on_complete(completed: int, index: int, result: str):
+            # Progress counts items as they complete, in whatever order they finish
+            if partial is not None:
+                await partial.add(completed, index, result)
+            else:
+                await progress.update(completed)
 
-    # Report 100% completion
-    await ctx.report_progress(progress=total, total=total)
+        await progress.update(0)
+        results = await map_ordered(process, items, workers, on_complete)
 
+    await ctx.debug(
+        f"Sent {progress.sent} progress notifications, coalesced {progress.coalesced}"
+    )
     return {"processed": len(results), "results": results}
 
 
@@ -0,0 +1,59 @@
+# Client-side async iterator over the partial results streamed by a tool call
+
+import asyncio
+import json
+from typing import Any
+
+from fastmcp import Client
+from fastmcp.client.client import CallToolResult
+
+
+class ToolStream:
+    """Calls a tool and yields its partial results as they arrive.
+
+    Partial results are read from the ``{"partial": [[index, result], ...]}``
+    messages of the call's progress notifications, each chunk is yielded as a
+    list of ``(index, result)`` pairs. Once iteration ends ``result`` holds the
+    final tool result. Breaking out of the loop cancels the call.
+
+        stream = ToolStream(client, "process_items", {..., "stream_results": True})
+        async for chunk in stream:
+            ...
+    """
+
+    def __init__(self, client: Client, name: str, arguments: dict[str, Any]):
+        self.client = client
+        self.name = name
+        self.arguments = arguments
+        self.result: CallToolResult | None = None
+
+    async def __aiter__(self):
+        queue: asyncio.Queue[list | None] = asyncio.Queue()
+
+        async def on_progress(
+            progress: float, total: float | None, message: str | None
+        ):
+            if not message:
+                return
+            try:
+                partial = json.loads(message).get("partial")
+            except (ValueError, AttributeError):
+                return
+            if partial:
+                queue.put_nowait([tuple(pair) for pair in partial])
+
+        call = asyncio.create_task(
+            self.client.call_tool(
+                self.name, self.arguments, progress_handler=on_progress
+            )
+        )
+        # Notifications are handled before the response, so None comes last
+        call.add_done_callback(lambda _: queue.put_nowait(None))
+
+        try:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+            self.result = await call
+        finally:
+            if not call.done():
+                call.cancel()
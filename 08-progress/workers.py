@@ -0,0 +1,66 @@
+# Bounded-concurrency mapping of items, keeping input order, for process_items
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, Literal, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+ExecutorKind = Literal["thread", "process"]
+
+# Pools are created on first use and shared by all the calls
+_executors: dict[str, Executor] = {}
+
+
+def get_executor(kind: ExecutorKind) -> Executor:
+    """Shared pool for CPU-bound work: threads for code releasing the GIL, processes otherwise."""
+    if kind not in _executors:
+        _executors[kind] = (
+            ThreadPoolExecutor() if kind == "thread" else ProcessPoolExecutor()
+        )
+    return _executors[kind]
+
+
+async def run_in_executor(
+    kind: ExecutorKind | None, function: Callable[[T], R], item: T
+) -> R:
+    """Run a synchronous function inline, or in the shared pool of the given kind."""
+    if kind is None:
+        return function(item)
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(kind), function, item
+    )
+
+
+async def map_ordered(
+    function: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    workers: int,
+    on_complete: Callable[[int, int, R], Awaitable[None]] | None = None,
+) -> list[R]:
+    """Apply an async function to every item, at most ``workers`` at a time.
+
+    Results are returned in input order whatever the completion order.
+    ``on_complete`` is awaited after each item with the number of items
+    completed so far, the item's index and its result.
+    """
+    items = list(items)
+    results: list[R] = [None] * len(items)
+    pending = iter(enumerate(items))
+    completed = 0
+
+    async def worker():
+        nonlocal completed
+        # Workers share the iterator, so each item is taken exactly once
+        for index, item in pending:
+            results[index] = await function(item)
+            completed += 1
+            if on_complete is not None:
+                await on_complete(completed, index, results[index])
+
+    # A failing item cancels the other workers and propagates its exception
+    async with asyncio.TaskGroup() as group:
+        for _ in range(min(workers, len(items))):
+            group.create_task(worker())
+    return results
@@ -0,0 +1,86 @@
+# Measures repeated reads of unchanged files: uncached, from the chunk cache, and conditional
+
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from fastmcp import Client
+from files import ChunkCache, read_chunk
+from rich.console import Console
+from rich.table import Table
+from server import chunks, mcp
+
+SIZES = (2_000, 100_000, 1_000_000)
+READS = 200
+
+console = Console()
+
+
+def timed(function, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(times)
+
+
+async def timed_call(client: Client, arguments: dict) -> tuple[float, int]:
+    times = []
+    for _ in range(READS):
+        start = time.perf_counter()
+        result = await client.call_tool("read_file", arguments)
+        times.append((time.perf_counter() - start) * 1_000_000)
+    size = len(json.dumps(result.structured_content)) + sum(
+        len(content.model_dump_json()) for content in result.content
+    )
+    return statistics.median(times), size
+
+
+async def main():
+    # "304" is a conditional read of an unchanged file, as in HTTP
+    table = Table(title=f"Reading an unchanged file, median of {READS} reads")
+    for column in (
+        "size",
+        "read µs",
+        "hit µs",
+        "call µs",
+        "304 µs",
+        "sent",
+        "304 sent",
+    ):
+        table.add_column(column)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        async with Client(mcp, roots=[Path(tmp).as_uri()]) as client:
+            for size in SIZES:
+                path = Path(tmp) / f"config{size}.json"
+                path.write_text(json.dumps({"key": "v" * (size - 12)}))
+                cache = ChunkCache()
+                cache.read(path)
+                chunks.read(path)
+
+                arguments = {"filename": path.name}
+                full, full_bytes = await timed_call(client, arguments)
+                version = chunks.read(path).version
+                conditional, conditional_bytes = await timed_call(
+                    client, {**arguments, "if_none_match": version}
+                )
+                table.add_row(
+                    f"{size:,}",
+                    f"{timed(lambda: read_chunk(path), READS):.0f}",
+                    f"{timed(lambda: cache.read(path), READS):.0f}",
+                    f"{full:.0f}",
+                    f"{conditional:.0f}",
+                    f"{full_bytes:,}",
+                    f"{conditional_bytes:,}",
+                )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
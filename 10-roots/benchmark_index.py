@@ -0,0 +1,113 @@
+# Measures glob, listing and grep on a 100k-file tree, walking it each time vs with the index
+
+import asyncio
+import fnmatch
+import os
+import re
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from index import FileIndex, grep
+from rich.console import Console
+from rich.table import Table
+
+DIRECTORIES = 100
+SUBDIRECTORIES = 10
+FILES_PER_DIRECTORY = 100
+RUNS = 5
+
+console = Console()
+
+
+def build_tree(root: Path):
+    for i in range(DIRECTORIES):
+        for j in range(SUBDIRECTORIES):
+            directory = root / f"package{i}" / f"module{j}"
+            directory.mkdir(parents=True)
+            for k in range(FILES_PER_DIRECTORY):
+                suffix = ".py" if k % 2 else ".txt"
+                # One file in a thousand contains the searched word
+                word = "needle" if (i * 1000 + j * 100 + k) % 1000 == 0 else "hay"
+                (directory / f"file{k}{suffix}").write_text(
+                    f"# file {k}\nvalue = '{word}'\n" + "x = 1\n" * 20
+                )
+
+
+def walk_files(root: Path) -> list[str]:
+    return [os.path.join(d, name) for d, _, names in os.walk(root) for name in names]
+
+
+def timed(function, runs: int = RUNS) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def grep_all(paths: list[str]) -> int:
+    found, _, _ = grep(
+        paths, re.compile("needle"), 10**6, lambda _: None, threading.Event()
+    )
+    return found
+
+
+async def watch_latency(index: FileIndex, root: Path) -> float:
+    """Time between creating a file and the index listing it."""
+    path = root / "package0" / "module0" / "created.py"
+    start = time.perf_counter()
+    path.write_text("created = True\n")
+    while "package0/module0/created.py" not in index._files:
+        await asyncio.sleep(0.005)
+    return (time.perf_counter() - start) * 1000
+
+
+async def main():
+    files = DIRECTORIES * SUBDIRECTORIES * FILES_PER_DIRECTORY
+    table = Table(title=f"File tree of {files:,} files, median of {RUNS} runs")
+    for column in ("operation", "walking the tree ms", "with the index ms"):
+        table.add_column(column)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root)
+
+        start = time.perf_counter()
+        index = FileIndex(root)
+        await index.start()
+        build = (time.perf_counter() - start) * 1000
+        table.add_row("initial index build (once)", "", f"{build:.0f}")
+
+        table.add_row(
+            "glob **/*.py",
+            f"{timed(lambda: [p for p in walk_files(root) if fnmatch.fnmatch(p, '*.py')]):.0f}",
+            f"{timed(lambda: index.glob('**/*.py')):.0f}",
+        )
+        table.add_row(
+            "glob package7/module3/*.py",
+            f"{timed(lambda: list((root / 'package7' / 'module3').glob('*.py'))):.1f}",
+            f"{timed(lambda: index.glob('package7/module3/*.py')):.1f}",
+        )
+        table.add_row(
+            "list a directory",
+            f"{timed(lambda: [e.stat() for e in os.scandir(root / 'package7' / 'module3')]):.2f}",
+            f"{timed(lambda: index.list_dir('package7/module3')):.2f}",
+        )
+        table.add_row(
+            "grep needle, all files",
+            f"{timed(lambda: grep_all(walk_files(root)), runs=1):.0f}",
+            f"{timed(lambda: grep_all(index.glob('**')), runs=1):.0f}",
+        )
+        latency = await watch_latency(index, root)
+        table.add_row("new file visible (watcher)", "", f"{latency:.0f}")
+        await index.close()
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+# Measures latency and peak memory of reading a 1 GB file whole, by range and in chunks
+
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from files import MAX_CHUNK, iter_chunks, read_chunk
+from rich.console import Console
+from rich.table import Table
+
+FILE_SIZE = 1024 * 1024 * 1024
+
+console = Console()
+
+# Each case runs in a fresh process, so its peak RSS is its own
+CASES = {
+    "whole file, read_text (before)": lambda path: path.read_text(),
+    "4 MB range, buffered read": lambda path: read_chunk(
+        path, FILE_SIZE // 2, MAX_CHUNK, use_mmap=False
+    ),
+    "4 MB range, mmap": lambda path: read_chunk(
+        path, FILE_SIZE // 2, MAX_CHUNK, use_mmap=True
+    ),
+    "all chunks, text": lambda path: sum(c.length for c in iter_chunks(path)),
+    "all chunks, base64": lambda path: sum(
+        c.length for c in iter_chunks(path, binary=True)
+    ),
+}
+
+
+def peak_rss_mb() -> float:
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb() -> float:
+    pages = int(Path("/proc/self/statm").read_text().split()[1])
+    return pages * resource.getpagesize() / 1024**2
+
+
+def run_case(name: str, path: Path):
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    CASES[name](path)
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed * 1000:.1f} {peak_rss_mb() - baseline:.1f}")
+
+
+def write_file(path: Path):
+    line = b"The sky whispers secrets to the sea, and the waves carry them home.\n"
+    block = line * (MAX_CHUNK // len(line))
+    with open(path, "wb") as f:
+        while f.tell() < FILE_SIZE:
+            f.write(block[: FILE_SIZE - f.tell()])
+
+
+def check_read_modes(directory: Path):
+    """Both read paths must return the same chunks, text or binary."""
+    samples = {
+        "text.txt": "Lines of text, with some UTF-8: é ü 🌊\n".encode() * 1000,
+        # Valid UTF-8, only the NUL bytes tell it is binary
+        "zeros.bin": bytes(64 * 1024),
+        "random.bin": bytes(range(256)) * 256,
+    }
+    for name, content in samples.items():
+        path = directory / name
+        path.write_bytes(content)
+        buffered = read_chunk(path, use_mmap=False)
+        mapped = read_chunk(path, use_mmap=True)
+        assert buffered == mapped, f"mmap and buffered reads differ on {name}"
+        expected = "text" if name.endswith(".txt") else "base64"
+        assert mapped.encoding == expected, f"{name} read as {mapped.encoding}"
+
+
+def main():
+    table = Table(title=f"Reading a {FILE_SIZE // 1024**2:,} MB text file")
+    for column in ("case", "latency ms", "peak RSS increase MB"):
+        table.add_column(column)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_read_modes(Path(tmp))
+        path = Path(tmp) / "large.txt"
+        write_file(path)
+        # Warm the page cache, every case then reads from memory. In blocks, as
+        # a child process starts with the peak RSS of its parent
+        with open(path, "rb") as f:
+            while f.read(MAX_CHUNK):
+                pass
+
+        for name in CASES:
+            output = subprocess.run(
+                [sys.executable, __file__, name, str(path)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            latency, rss = output.split()
+            table.add_row(name, latency, rss)
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        run_case(sys.argv[1], Path(sys.argv[2]))
+    else:
+        main()
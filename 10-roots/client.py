@@ -1,9 +1,11 @@
 import asyncio
+import base64
 import os
 from pathlib import Path
 
 from fastmcp import Client
 from fastmcp.client.roots import RequestContext
+from mcp.types import BlobResourceContents, EmbeddedResource, TextContent
 from rich.console import Console
 
 console = Console()
@@ -12,21 +14,67 @@ console.clear()
 current_dir = Path(__file__).parent.absolute()
 
 
+# Define roots to be used by the client - use current directory
+roots = [f"file://{current_dir}"]
+
+
 # Root can also be provided through a callback to dynamically authorize them per request
 async def roots_callback(context: RequestContext) -> list[str]:
     console.print(f"Server requested roots (Request ID: {context.request_id})")
-    return [f"file://{current_dir}/roots"]
+    return roots
 
 
-# Define roots to be used by the client - use current directory
-roots = [f"file://{current_dir}"]
+def chunk_content(content: TextContent | EmbeddedResource) -> str | bytes:
+    """The text of a read_file chunk, or its bytes when returned as a base64 blob."""
+    if isinstance(content, EmbeddedResource) and isinstance(
+        content.resource, BlobResourceContents
+    ):
+        return base64.b64decode(content.resource.blob)
+    return content.text
 
 
 async def main():
     # Create the client specifying the roots the server can access
-    async with Client("http://localhost:8000/mcp", roots=roots) as client:
+    async with Client("http://localhost:8000/mcp", roots=roots_callback) as client:
         result = await client.call_tool("read_file", {"filename": "poem.txt"})
         console.print(result, style="bold blue")
 
+        # Reading again with the version already read returns no content if unchanged
+        version = result.structured_content["version"]
+        result = await client.call_tool(
+            "read_file", {"filename": "poem.txt", "if_none_match": version}
+        )
+        console.print(result.structured_content, style="bold blue")
+
+        # Large files are read in chunks, each result gives the offset of the next one
+        offset = 0
+        while offset is not None:
+            result = await client.call_tool(
+                "read_file", {"filename": "poem.txt", "offset": offset, "length": 32}
+            )
+            # Binary files, and ranges too short for a whole character, are blobs
+            data = chunk_content(result.content[0])
+            console.print(f"{offset}: {data!r}", style="bold green")
+            offset = result.structured_content["next_offset"]
+
+        # Searches run over the server's index of all the roots
+        result = await client.call_tool("list_directory", {"path": "."})
+        console.print([entry["path"] for entry in result.data], style="bold green")
+        result = await client.call_tool("glob_files", {"pattern": "**/*.py"})
+        console.print(result.data, style="bold green")
+        result = await client.call_tool(
+            "grep_files", {"pattern": "roots", "glob": "*.py", "limit": 10}
+        )
+        for match in result.data.matches:
+            console.print(f"{match.path}:{match.line_number}: {match.line}")
+
+        # The server caches the roots, it must be told when they change
+        roots[:] = [f"file://{current_dir}/roots"]
+        await client.send_roots_list_changed()
+        result = await client.call_tool(
+            "read_file", {"filename": "poem.txt"}, raise_on_error=False
+        )
+        console.print(result, style="bold blue")
+
 
 asyncio.run(main())
@@ -0,0 +1,235 @@
+# Range reads of local files: bounded chunks, memory-mapped for large files
+
+import base64
+import codecs
+import mimetypes
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Literal
+
+# Largest chunk returned by one read, bigger files are read in several
+MAX_CHUNK = 4 * 1024 * 1024
+
+# Files from this size on are memory-mapped instead of read into a buffer
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+# Bytes looked at to tell text files from binary ones
+SNIFF_BYTES = 8192
+
+
+@dataclass
+class FileChunk:
+    """A range of a file, as text or as base64 for binary content."""
+
+    path: str
+    size: int
+    offset: int
+    length: int
+    # Offset of the following chunk, None once the end of the file is reached
+    next_offset: int | None
+    mime_type: str
+    encoding: Literal["text", "base64"]
+    content: str
+    # Version of the whole file the chunk was read from
+    version: str
+
+    def metadata(self) -> dict:
+        return {
+            "path": self.path,
+            "size": self.size,
+            "offset": self.offset,
+            "length": self.length,
+            "next_offset": self.next_offset,
+            "mime_type": self.mime_type,
+            "encoding": self.encoding,
+            "version": self.version,
+        }
+
+
+def file_version(info: os.stat_result) -> str:
+    """Version of a file from its metadata, changed by any write to it."""
+    return f"{info.st_ino:x}-{info.st_size:x}-{info.st_mtime_ns:x}"
+
+
+def _decode_text(data, final: bool) -> tuple[str, int] | None:
+    """Decode UTF-8 up to the last complete character, None if not valid UTF-8."""
+    try:
+        # Not final: an incomplete character at the end is left for the next chunk
+        return codecs.utf_8_decode(data, "strict", final)
+    except UnicodeDecodeError:
+        return None
+
+
+def is_text(head: bytes) -> bool:
+    """Guess from the first bytes of a file whether it is UTF-8 text."""
+    return b"\0" not in head and _decode_text(head, final=False) is not None
+
+
+def _mime_type(path: Path, text: bool) -> str:
+    guessed, _ = mimetypes.guess_type(path.name)
+    if guessed is not None:
+        return guessed
+    return "text/plain" if text else "application/octet-stream"
+
+
+def _encode(
+    path: Path,
+    info: os.stat_result,
+    offset: int,
+    data,
+    text: bool,
+) -> FileChunk:
+    size = info.st_size
+    end = offset + len(data)
+    decoded = _decode_text(data, final=end == size) if text else None
+    # A range too short for a whole character falls back to base64 too
+    if decoded is not None and (decoded[1] > 0 or len(data) == 0):
+        content, length = decoded
+        encoding = "text"
+    else:
+        # Binary files, and ranges of text files not starting on a character
+        content = base64.b64encode(data).decode("ascii")
+        length = len(data)
+        encoding = "base64"
+    next_offset = offset + length if offset + length < size else None
+    return FileChunk(
+        str(path),
+        size,
+        offset,
+        length,
+        next_offset,
+        _mime_type(path, text),
+        encoding,
+        content,
+        file_version(info),
+    )
+
+
+def read_chunk(
+    path: Path,
+    offset: int = 0,
+    length: int | None = None,
+    binary: bool = False,
+    use_mmap: bool | None = None,
+) -> FileChunk:
+    """Read at most ``length`` bytes (and MAX_CHUNK) of a file from ``offset``.
+
+    Text files are returned as text, cut before an incomplete UTF-8 character
+    so ``next_offset`` always starts on one. Binary files, or any file with
+    ``binary=True``, are returned base64 encoded. Files of MMAP_THRESHOLD bytes
+    or more are memory-mapped (``use_mmap`` forces either way): the range is
+    encoded straight from the page cache, without reading it into a buffer.
+    """
+    with open(path, "rb") as f:
+        info = os.fstat(f.fileno())
+        size = info.st_size
+        if offset < 0 or offset > size:
+            raise ValueError(f"Offset {offset} is outside of the file ({size} bytes)")
+        if length is not None and length < 0:
+            raise ValueError(f"Length must be positive, got {length}")
+        length = min(size - offset, MAX_CHUNK if length is None else length, MAX_CHUNK)
+        if use_mmap is None:
+            use_mmap = size >= MMAP_THRESHOLD
+
+        if not use_mmap or size == 0:
+            text = not binary and is_text(f.read(SNIFF_BYTES))
+            f.seek(offset)
+            return _encode(path, info, offset, f.read(length), text)
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # Views are released before the map closes, it refuses to otherwise
+            with (
+                memoryview(mapped) as view,
+                view[:SNIFF_BYTES] as head,
+                view[offset : offset + length] as data,
+            ):
+                # The NUL test needs bytes, "in" on a memoryview compares items
+                text = not binary and is_text(head.tobytes())
+                return _encode(path, info, offset, data, text)
+
+
+def iter_chunks(
+    path: Path,
+    offset: int = 0,
+    chunk_size: int = MAX_CHUNK,
+    binary: bool = False,
+) -> Iterator[FileChunk]:
+    """Read a file chunk by chunk from ``offset`` to its end."""
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+    next_offset = offset
+    while next_offset is not None:
+        chunk = read_chunk(path, next_offset, chunk_size, binary)
+        yield chunk
+        next_offset = chunk.next_offset
+
+
+class ChunkCache:
+    """LRU of recently read chunks, keyed by path, file version and range.
+
+    A read costs a ``stat`` of the file: while its version is unchanged the
+    chunk comes from the cache, and a caller that already has that version
+    gets None instead of the content. The least recently used chunks are
+    evicted beyond ``max_entries`` or ``max_bytes`` of content.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, FileChunk] = OrderedDict()
+
+    def read(
+        self,
+        path: Path,
+        offset: int = 0,
+        length: int | None = None,
+        binary: bool = False,
+        if_none_match: str | None = None,
+    ) -> FileChunk | None:
+        """Read a chunk like read_chunk, None if the file is at ``if_none_match``."""
+        version = file_version(os.stat(path))
+        if version == if_none_match:
+            with self._lock:
+                self.not_modified += 1
+            return None
+
+        key = (str(path), version, offset, length, binary)
+        with self._lock:
+            chunk = self._entries.get(key)
+            if chunk is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return chunk
+            self.misses += 1
+
+        chunk = read_chunk(path, offset, length, binary)
+        if len(chunk.content) > self.max_bytes:
+            return chunk
+        with self._lock:
+            # Keyed by the version read, the file may have changed since the stat
+            key = (str(path), chunk.version, offset, length, binary)
+            if key not in self._entries:
+                self._entries[key] = chunk
+                self.size += len(chunk.content)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.content)
+        return chunk
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
@@ -0,0 +1,383 @@
+# Index of the files under each root, kept up to date by a filesystem watcher
+
+import asyncio
+import functools
+import os
+import re
+import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Literal
+
+from files import is_text
+from watchfiles import Change, DefaultFilter, awatch
+
+# Files larger than this are not searched by grep
+MAX_GREP_FILE_SIZE = 10 * 1024 * 1024
+
+# Lines longer than this are cut in grep results
+MAX_LINE_LENGTH = 500
+
+# Files searched per task of the grep pool. Reading files is mostly system
+# calls, which release the GIL, so several workers overlap their I/O
+GREP_BATCH = 500
+_grep_pool = ThreadPoolExecutor(
+    max_workers=min(8, (os.cpu_count() or 1) + 4), thread_name_prefix="grep"
+)
+
+
+@dataclass
+class FileEntry:
+    path: str
+    type: Literal["file", "directory"]
+    size: int | None = None
+    modified: float | None = None
+
+
+@dataclass
+class LineMatch:
+    path: str
+    line_number: int
+    line: str
+
+
+@functools.lru_cache(maxsize=256)
+def compile_glob(pattern: str) -> re.Pattern:
+    """Compile a glob matching paths relative to a root.
+
+    ``*`` and ``?`` do not cross directories, ``**`` does and ``**/`` also
+    matches no directory at all. ``[...]`` and ``[!...]`` are character classes.
+    """
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and (end := pattern.find("]", i + 2)) != -1:
+            chars = pattern[i + 1 : end].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            parts.append(f"[{chars}]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
+
+
+def _literal_parts(pattern: str) -> tuple[str, int | None, str]:
+    """What a glob fixes: its leading directory, its depth below it, its ending.
+
+    The depth is None when ``**`` matches any number of directories.
+    """
+    segments = pattern.split("/")
+    literal = 0
+    while literal < len(segments) - 1 and not any(
+        c in segments[literal] for c in "*?["
+    ):
+        literal += 1
+    base = "/".join(segments[:literal])
+    rest = segments[literal:]
+    depth = None if any("**" in segment for segment in rest) else len(rest) - 1
+    wildcard = max(pattern.rfind(c) for c in "*?]")
+    return base, depth, pattern[wildcard + 1 :]
+
+
+class FileIndex:
+    """Files and directories under a root, scanned once then watched.
+
+    ``start`` scans the tree in a thread and starts a watcher applying every
+    change to the index, so queries never walk the filesystem again. Symlinks
+    are not indexed, nor the entries ignored by watchfiles' DefaultFilter
+    (``.git``, ``__pycache__``, ``node_modules``, editor swap files...).
+    Queries can run in threads, they read the index under a lock.
+    """
+
+    def __init__(self, root: Path, debounce: int = 50):
+        self.root = root
+        self.debounce = debounce
+        # Joined to relative paths, faster than os.path.join for many paths
+        self._prefix = os.path.join(root, "")
+        self.updates = 0
+        self._filter = DefaultFilter()
+        self._lock = threading.Lock()
+        # Paths relative to the root, "" being the root itself
+        self._files: dict[str, tuple[int, float]] = {}
+        self._dirs: dict[str, set[str]] = {}
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """Start indexing the root, returns once the initial scan is done."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+        await self._ready.wait()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _watch(self):
+        changes: asyncio.Queue[set[tuple[Change, str]]] = asyncio.Queue()
+
+        async def collect():
+            async for batch in awatch(
+                self.root, watch_filter=self._filter, debounce=self.debounce
+            ):
+                changes.put_nowait(batch)
+
+        # Watching starts before the scan, changes made during it are applied after
+        collector = asyncio.create_task(collect())
+        try:
+            await asyncio.sleep(0)
+            await asyncio.to_thread(self._scan, "")
+            self._ready.set()
+            while True:
+                batch = await changes.get()
+                await asyncio.to_thread(self._apply, batch)
+        finally:
+            collector.cancel()
+
+    def _relative(self, path: str) -> str | None:
+        relative = os.path.relpath(path, self.root)
+        if relative == ".":
+            return ""
+        if relative.startswith(".."):
+            return None
+        return Path(relative).as_posix()
+
+    def _scan(self, directory: str):
+        """Index a directory and everything under it."""
+        pending = [directory]
+        while pending:
+            relative = pending.pop()
+            try:
+                entries = list(os.scandir(self.root / relative))
+            except OSError:
+                continue
+            with self._lock:
+                self._add_parents(relative)
+                children = self._dirs.setdefault(relative, set())
+                for entry in entries:
+                    if not self._filter(Change.added, entry.path):
+                        continue
+                    child = f"{relative}/{entry.name}" if relative else entry.name
+                    try:
+                        info = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(info.st_mode):
+                        children.add(entry.name)
+                        self._dirs.setdefault(child, set())
+                        pending.append(child)
+                    elif stat.S_ISREG(info.st_mode):
+                        children.add(entry.name)
+                        self._files[child] = (info.st_size, info.st_mtime)
+
+    def _add_parents(self, relative: str):
+        while relative:
+            parent, _, name = relative.rpartition("/")
+            self._dirs.setdefault(parent, set()).add(name)
+            relative = parent
+
+    def _remove(self, relative: str):
+        self._files.pop(relative, None)
+        if relative in self._dirs:
+            prefix = relative + "/"
+            for files_or_dirs in (self._files, self._dirs):
+                for key in [key for key in files_or_dirs if key.startswith(prefix)]:
+                    del files_or_dirs[key]
+            del self._dirs[relative]
+        parent, _, name = relative.rpartition("/")
+        if parent in self._dirs:
+            self._dirs[parent].discard(name)
+
+    def _apply(self, batch: set[tuple[Change, str]]):
+        self.updates += len(batch)
+        for change, path in batch:
+            relative = self._relative(path)
+            if not relative:
+                continue
+            try:
+                info = os.lstat(path)
+            except OSError:
+                # Deleted, possibly right after being added
+                with self._lock:
+                    self._remove(relative)
+                continue
+            if stat.S_ISDIR(info.st_mode):
+                # A directory moved in arrives as one change, its content with it
+                self._scan(relative)
+            elif stat.S_ISREG(info.st_mode):
+                with self._lock:
+                    self._add_parents(relative)
+                    self._files[relative] = (info.st_size, info.st_mtime)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def list_dir(self, relative: str) -> list[FileEntry] | None:
+        """Entries of a directory, None if it is not an indexed directory."""
+        with self._lock:
+            names = self._dirs.get(relative)
+            if names is None:
+                return None
+            entries = []
+            for name in sorted(names):
+                child = f"{relative}/{name}" if relative else name
+                path = self._prefix + child
+                if child in self._files:
+                    size, modified = self._files[child]
+                    entries.append(FileEntry(path, "file", size, modified))
+                else:
+                    entries.append(FileEntry(path, "directory"))
+            return entries
+
+    def _files_under(self, directory: str, depth: int | None) -> list[str]:
+        """Files in a directory, and its subdirectories down to ``depth``."""
+        files = []
+        pending = [(directory, 0)] if directory in self._dirs else []
+        while pending:
+            relative, level = pending.pop()
+            for name in self._dirs[relative]:
+                child = f"{relative}/{name}" if relative else name
+                if child in self._files:
+                    files.append(child)
+                elif depth is None or level < depth:
+                    pending.append((child, level + 1))
+        return files
+
+    def glob(self, pattern: str, limit: int | None = None) -> list[str]:
+        """Paths of the files whose path relative to the root matches a glob."""
+        regex = compile_glob(pattern)
+        base, depth, suffix = _literal_parts(pattern)
+        with self._lock:
+            # A copy of the paths, the watcher may update the index meanwhile.
+            # Only the directory named by the pattern is looked into
+            if base or depth is not None:
+                paths = self._files_under(base, depth)
+            else:
+                paths = list(self._files)
+        matches = []
+        for relative in paths:
+            # A string comparison rules out most paths before the regex
+            if relative.endswith(suffix) and regex.match(relative):
+                matches.append(self._prefix + relative)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+
+class IndexRegistry:
+    """File indexes of the last ``max_indexes`` roots used, shared by sessions."""
+
+    def __init__(self, max_indexes: int = 16, debounce: int = 50):
+        self.max_indexes = max_indexes
+        self.debounce = debounce
+        self._indexes: OrderedDict[Path, FileIndex] = OrderedDict()
+
+    async def get(self, root: Path) -> FileIndex:
+        index = self._indexes.get(root)
+        if index is None:
+            index = self._indexes[root] = FileIndex(root, self.debounce)
+            if len(self._indexes) > self.max_indexes:
+                _, evicted = self._indexes.popitem(last=False)
+                await evicted.close()
+        else:
+            self._indexes.move_to_end(root)
+        await index.start()
+        return index
+
+    def stats(self) -> dict:
+        return {
+            str(root): {"files": len(index), "updates": index.updates}
+            for root, index in self._indexes.items()
+        }
+
+
+def _search_file(path: str, pattern: re.Pattern) -> list[LineMatch] | None:
+    """Matching lines of a file, None if it cannot be read or is not text."""
+    try:
+        # Unbuffered, a file is read whole in one call
+        with open(path, "rb", buffering=0) as f:
+            data = f.read(MAX_GREP_FILE_SIZE + 1)
+    except OSError:
+        return None
+    if len(data) > MAX_GREP_FILE_SIZE or not is_text(data[:8192]):
+        return None
+    text = data.decode("utf-8", errors="replace")
+    # Most files do not match, they are ruled out without splitting lines
+    if pattern.search(text) is None:
+        return []
+    return [
+        LineMatch(path, number, line[:MAX_LINE_LENGTH])
+        for number, line in enumerate(text.splitlines(), start=1)
+        if pattern.search(line)
+    ]
+
+
+def _search_files(
+    paths: list[str], pattern: re.Pattern, stop: threading.Event
+) -> tuple[list[LineMatch], int]:
+    matches: list[LineMatch] = []
+    searched = 0
+    for path in paths:
+        if stop.is_set():
+            break
+        found = _search_file(path, pattern)
+        if found is not None:
+            searched += 1
+            matches.extend(found)
+    return matches, searched
+
+
+def grep(
+    paths: list[str],
+    pattern: re.Pattern,
+    limit: int,
+    emit: Callable[[list[LineMatch]], None],
+    stop: threading.Event,
+) -> tuple[int, int, bool]:
+    """Search files line by line on the grep thread pool.
+
+    Blocking, meant to run in a thread until done or until ``stop`` is set.
+    Files are searched in batches of GREP_BATCH by the pool workers, and the
+    matches of each batch are handed to ``emit`` in the order of ``paths``.
+    Binary files and files over MAX_GREP_FILE_SIZE are skipped. Returns the
+    number of matches, of files searched, and whether there were more than
+    ``limit`` matches.
+    """
+    batches = [paths[i : i + GREP_BATCH] for i in range(0, len(paths), GREP_BATCH)]
+    found = searched = 0
+    truncated = False
+    results = _grep_pool.map(lambda batch: _search_files(batch, pattern, stop), batches)
+    try:
+        for matches, batch_searched in results:
+            searched += batch_searched
+            # Truncated only if a match beyond the limit exists
+            if found + len(matches) > limit:
+                matches = matches[: limit - found]
+                truncated = True
+            if matches:
+                found += len(matches)
+                emit(matches)
+            if truncated or stop.is_set():
+                break
+    finally:
+        # Batches not started yet are skipped, running ones stop at their next file
+        stop.set()
+    return found, searched, truncated
@@ -0,0 +1,130 @@
+# Roots authorized by each client session, cached and indexed for path checks
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+from weakref import WeakKeyDictionary
+
+from fastmcp import Context
+from mcp.server.session import ServerSession
+
+
+def uri_to_path(uri: str) -> Path | None:
+    """Local path of a file:// URI, None for any other scheme."""
+    parsed = urlparse(str(uri))
+    if parsed.scheme != "file":
+        return None
+    return Path(unquote(parsed.path))
+
+
+class RootIndex:
+    """The roots of a session, resolved once into a set of authorized prefixes.
+
+    A path is authorized when, after resolving symlinks and ``..``, itself or
+    one of its parents is a root. That is one set lookup per path component,
+    whatever the number of roots.
+    """
+
+    def __init__(self, uris: list[str]):
+        self.roots: list[Path] = []
+        for uri in uris:
+            path = uri_to_path(uri)
+            if path is not None:
+                self.roots.append(path.resolve())
+        self._prefixes = frozenset(str(root) for root in self.roots)
+
+    def root_of(self, resolved: Path) -> Path | None:
+        """The innermost root containing an already resolved path."""
+        for candidate in (resolved, *resolved.parents):
+            if str(candidate) in self._prefixes:
+                return candidate
+        return None
+
+    def authorize(self, path: Path) -> Path | None:
+        """The resolved path if it lies within a root, None otherwise."""
+        resolved = path.resolve()
+        return resolved if self.root_of(resolved) is not None else None
+
+    def resolve(self, filename: str) -> Path:
+        """Find ``filename`` in the roots, trying them in order if it is relative.
+
+        Raises PermissionError for a path outside of every root, even through
+        a symlink, and FileNotFoundError when no root has the file.
+        """
+        path = uri_to_path(filename) if filename.startswith("file:") else None
+        if path is None:
+            path = Path(filename)
+        if path.is_absolute():
+            candidates = [path]
+        else:
+            candidates = [root / path for root in self.roots if root.is_dir()]
+
+        denied = False
+        for candidate in candidates:
+            authorized = self.authorize(candidate)
+            if authorized is None:
+                denied = True
+            elif os.path.exists(authorized):
+                return authorized
+        if denied:
+            raise PermissionError(f"{filename} is outside of the authorized roots")
+        raise FileNotFoundError(f"{filename} was not found in the authorized roots")
+
+
+class RootsCache:
+    """Root indexes of the last ``max_sessions`` client sessions.
+
+    The roots are listed from the client on the first use in a session, then
+    served from the cache until ``invalidate``, called when a client notifies
+    that its roots changed.
+    """
+
+    def __init__(self, max_sessions: int = 1024):
+        self.max_sessions = max_sessions
+        self.hits = 0
+        self.misses = 0
+        self._indexes: OrderedDict[str, RootIndex] = OrderedDict()
+        # Session ids by session, notifications only come with the session
+        self._session_ids: WeakKeyDictionary[ServerSession, str] = WeakKeyDictionary()
+        # Bumped by invalidate, a listing started before is not cached
+        self._generation = 0
+
+    async def get(self, ctx: Context) -> RootIndex:
+        index = self._indexes.get(ctx.session_id)
+        if index is not None:
+            self.hits += 1
+            self._indexes.move_to_end(ctx.session_id)
+            return index
+
+        self.misses += 1
+        self._session_ids[ctx.session] = ctx.session_id
+        generation = self._generation
+        roots = await ctx.list_roots()
+        index = RootIndex([str(root.uri) for root in roots])
+        if generation == self._generation:
+            self._indexes[ctx.session_id] = index
+            if len(self._indexes) > self.max_sessions:
+                self._indexes.popitem(last=False)
+        return index
+
+    def invalidate(self, session_id: str | None = None):
+        """Forget the roots of a session, or of all sessions."""
+        self._generation += 1
+        if session_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(session_id, None)
+
+    def invalidate_session(self, session: ServerSession):
+        """Forget the roots of the session a notification came from."""
+        session_id = self._session_ids.get(session)
+        if session_id is not None:
+            self.invalidate(session_id)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._indexes),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,31 +1,271 @@
 # MCP roots define the base locations that a client authorizes a server to access.
 
+import asyncio
+import json
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Annotated
+
 from fastmcp import Context, FastMCP
 from fastmcp.exceptions import ToolError
+from fastmcp.tools.tool import ToolResult
+from files import MAX_CHUNK, ChunkCache
+from index import FileEntry, IndexRegistry, LineMatch, grep
+from mcp.types import (
+    BlobResourceContents,
+    ClientNotification,
+    EmbeddedResource,
+    RootsListChangedNotification,
+    TextContent,
+)
+from pydantic import Field
+from roots import RootIndex, RootsCache
 
 mcp = FastMCP("RootsServer")
 
 
-# This tool uses the provided roots to identify the allowed file locations.
-@mcp.tool
-async def read_file(filename: str, ctx: Context) -> str:
-    """Read the contents of a file."""
-    all_roots = []
+# Roots of each session, listed once instead of on every file access
+roots_cache = RootsCache()
+
+
+# Notification handlers are not told which session a notification came from,
+# the message handler is. This wraps _handle_message of the low-level server
+# (mcp._mcp_server), checked with the mcp 1.30.0 and fastmcp 2.12.3 in uv.lock.
+# pyproject.toml keeps them below 1.31 and 2.13: check it still takes the
+# message and the session first when raising either bound
+_handle_message = mcp._mcp_server._handle_message
+
+
+async def _handle_message_with_roots(message, session, *args, **kwargs):
+    if isinstance(message, ClientNotification) and isinstance(
+        message.root, RootsListChangedNotification
+    ):
+        # Only the roots of the client that changed them are listed again
+        roots_cache.invalidate_session(session)
+    await _handle_message(message, session, *args, **kwargs)
+
+
+mcp._mcp_server._handle_message = _handle_message_with_roots
+
+# Recently read chunks, served again while their file is unchanged
+chunks = ChunkCache()
+
+# File indexes of the roots, built on first search then updated by a watcher
+indexes = IndexRegistry()
+
+# Most results a search returns
+MAX_RESULTS = 1000
+
+
+@dataclass
+class GlobResult:
+    paths: list[str]
+    truncated: bool
+
+
+@dataclass
+class GrepResult:
+    matches: list[LineMatch]
+    files_searched: int
+    truncated: bool
+
+
+async def _get_roots(ctx: Context) -> RootIndex:
     try:
-        all_roots = await ctx.list_roots()
+        index = await roots_cache.get(ctx)
+        if not index.roots:
+            raise ValueError("the client authorized no file:// root")
     except Exception as e:
         print(f"Error listing roots: {e}")
         raise ToolError(
             "No roots available to read the file. Please specify them in client configuration."
         )
+    return index
+
+
+async def _resolve_path(filename: str, ctx: Context) -> Path:
+    index = await _get_roots(ctx)
+    # The file is looked up in every root, and must resolve to a path within one
+    try:
+        return index.resolve(filename)
+    except (PermissionError, FileNotFoundError) as e:
+        raise ToolError(str(e))
+
+
+# This tool uses the provided roots to identify the allowed file locations.
+@mcp.tool
+async def read_file(
+    filename: str,
+    ctx: Context,
+    offset: Annotated[int, Field(ge=0, description="First byte to read")] = 0,
+    length: Annotated[
+        int | None,
+        Field(ge=0, description=f"Bytes to read, at most {MAX_CHUNK}"),
+    ] = None,
+    binary: Annotated[
+        bool, Field(description="Return the bytes as a blob even for a text file")
+    ] = False,
+    if_none_match: Annotated[
+        str | None,
+        Field(description="Version already read, nothing is returned if unchanged"),
+    ] = None,
+) -> ToolResult:
+    """Read the contents of a file, or a range of it.
+
+    Text files are returned as text and binary files as a base64 blob. Large
+    files are returned in chunks: the structured result gives the file size
+    and the next_offset to read from, null once the end is reached. It also
+    gives the file version: passed back as if_none_match, an unchanged file
+    is answered with not_modified and no content.
+    """
+    path = await _resolve_path(filename, ctx)
+    try:
+        # Disk reads block, they run in a thread
+        chunk = await asyncio.to_thread(
+            chunks.read, path, offset, length, binary, if_none_match
+        )
+    except (OSError, ValueError) as e:
+        raise ToolError(f"Cannot read {filename}: {e}")
+
+    if chunk is None:
+        return ToolResult(
+            content=[TextContent(type="text", text="Not modified")],
+            structured_content={
+                "path": str(path),
+                "version": if_none_match,
+                "not_modified": True,
+            },
+        )
+
+    if chunk.encoding == "text":
+        content = TextContent(type="text", text=chunk.content)
+    else:
+        content = EmbeddedResource(
+            type="resource",
+            resource=BlobResourceContents(
+                uri=path.as_uri(), mimeType=chunk.mime_type, blob=chunk.content
+            ),
+        )
+    return ToolResult(
+        content=[content],
+        structured_content={**chunk.metadata(), "not_modified": False},
+    )
+
+
+async def _glob(index: RootIndex, pattern: str, limit: int | None) -> list[str]:
+    """Files matching a glob in all roots, indexed on first use."""
+    matches: dict[str, None] = {}
+    for root in index.roots:
+        if not root.is_dir():
+            continue
+        file_index = await indexes.get(root)
+        # Matching 100k paths takes milliseconds, off the event loop
+        found = await asyncio.to_thread(file_index.glob, pattern, limit)
+        # Nested roots find the same files, they are kept once
+        matches.update(dict.fromkeys(found))
+        if limit is not None and len(matches) >= limit:
+            break
+    return list(matches)
+
+
+@mcp.tool
+async def list_directory(
+    ctx: Context,
+    path: Annotated[
+        str | None,
+        Field(description="Directory to list, the authorized roots if omitted"),
+    ] = None,
+) -> list[FileEntry]:
+    """List the files and directories of a directory within the roots."""
+    index = await _get_roots(ctx)
+    if path is None:
+        return [FileEntry(str(root), "directory") for root in index.roots]
+
+    directory = await _resolve_path(path, ctx)
+    root = index.root_of(directory)
+    relative = directory.relative_to(root).as_posix()
+    entries = (await indexes.get(root)).list_dir("" if relative == "." else relative)
+    if entries is None:
+        raise ToolError(f"{path} is not a directory")
+    return entries
+
+
+@mcp.tool
+async def glob_files(
+    pattern: Annotated[
+        str, Field(description="Glob relative to the roots, like **/*.py or docs/*")
+    ],
+    ctx: Context,
+    limit: Annotated[int, Field(ge=1, le=MAX_RESULTS)] = 100,
+) -> GlobResult:
+    """Find the files matching a glob pattern in all the roots."""
+    index = await _get_roots(ctx)
+    paths = await _glob(index, pattern, limit + 1)
+    return GlobResult(paths[:limit], len(paths) > limit)
+
+
+@mcp.tool
+async def grep_files(
+    pattern: Annotated[str, Field(description="Regular expression searched per line")],
+    ctx: Context,
+    glob: Annotated[str, Field(description="Files to search")] = "**",
+    ignore_case: bool = False,
+    limit: Annotated[int, Field(ge=1, le=MAX_RESULTS)] = 100,
+) -> GrepResult:
+    """Search the lines of the files within the roots for a regular expression.
+
+    Matches are streamed as they are found, as progress notifications whose
+    message is {"partial": [[path, line_number, line], ...]}.
+    """
+    try:
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    except re.error as e:
+        raise ToolError(f"Invalid pattern: {e}")
+    paths = await _glob(await _get_roots(ctx), glob, None)
+
+    loop = asyncio.get_running_loop()
+    batches: asyncio.Queue[list[LineMatch] | None] = asyncio.Queue()
+    stop = threading.Event()
+
+    def emit(batch: list[LineMatch]):
+        loop.call_soon_threadsafe(batches.put_nowait, batch)
+
+    def search() -> tuple[int, int, bool]:
+        try:
+            return grep(paths, regex, limit, emit, stop)
+        finally:
+            loop.call_soon_threadsafe(batches.put_nowait, None)
+
+    # The search runs in a thread, its matches are sent while it goes on
+    searching = asyncio.ensure_future(asyncio.to_thread(search))
+    matches: list[LineMatch] = []
+    try:
+        while (batch := await batches.get()) is not None:
+            matches.extend(batch)
+            await ctx.report_progress(
+                progress=len(matches),
+                total=limit,
+                message=json.dumps(
+                    {"partial": [[m.path, m.line_number, m.line] for m in batch]}
+                ),
+            )
+        _, searched, truncated = await searching
+    finally:
+        # Stops the thread when the request is cancelled
+        stop.set()
+    return GrepResult(matches, searched, truncated)
 
-    # For simplicity, we just use the first root, we read the file relative to it.
-    file_uri = f"{all_roots[0].uri}/{filename}".replace("file://", "")
 
-    text = ""
-    with open(file_uri, "r") as f:
-        text = f.read()
-    return text
+@mcp.resource("data://index/stats")
+def index_stats() -> dict:
+    """Files indexed per root, with the roots and chunk caches counters."""
+    return {
+        "indexes": indexes.stats(),
+        "roots": roots_cache.stats(),
+        "chunks": chunks.stats(),
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,57 @@
+# Measures the cost of writing and loading a checkpoint, for growing checkpoint sizes
+
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from checkpoints import CheckpointStore
+from rich.console import Console
+from rich.table import Table
+
+WRITES = 1_000
+STEPS = (10, 1_000, 10_000)
+
+console = Console()
+
+
+def measure(store: CheckpointStore, steps: int) -> tuple[list[float], list[float]]:
+    results = [f"Step {i + 1} completed" for i in range(steps)]
+    saves, loads = [], []
+    for write in range(WRITES):
+        start = time.perf_counter()
+        store.save(f"job-{steps}-{write % 10}", {"results": results})
+        saves.append((time.perf_counter() - start) * 1_000_000)
+
+        start = time.perf_counter()
+        store.load(f"job-{steps}-{write % 10}")
+        loads.append((time.perf_counter() - start) * 1_000_000)
+    return saves, loads
+
+
+def main():
+    table = Table(title=f"Checkpoint cost, {WRITES} writes per size")
+    for column in ("steps", "bytes", "save mean µs", "save p99 µs", "load mean µs"):
+        table.add_column(column)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CheckpointStore(Path(tmp) / "checkpoints.db", max_bytes=10_000_000)
+        for steps in STEPS:
+            saves, loads = measure(store, steps)
+            state = {"results": [f"Step {i + 1} completed" for i in range(steps)]}
+            size = len(json.dumps(state))
+            table.add_row(
+                f"{steps:,}",
+                f"{size:,}",
+                f"{statistics.mean(saves):.0f}",
+                f"{statistics.quantiles(saves, n=100)[98]:.0f}",
+                f"{statistics.mean(loads):.0f}",
+            )
+        store.close()
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Cooperative cancellation of blocking work offloaded to a thread or a process
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.managers import SyncManager
+from typing import Any, Callable, Literal
+
+import anyio
+
+ExecutorKind = Literal["thread", "process"]
+
+# Forking a process that runs threads is unsafe, children start from a clean server
+_mp = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Started on first use: worker processes import the server once, and the
+# manager hosts the events of process tokens, which pool tasks can receive
+_process_pool: ProcessPoolExecutor | None = None
+_manager: SyncManager | None = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(mp_context=_mp)
+    return _process_pool
+
+
+def _get_manager() -> SyncManager:
+    global _manager
+    if _manager is None:
+        _manager = _mp.Manager()
+    return _manager
+
+
+class WorkCancelled(Exception):
+    """Raised inside offloaded work by CancelToken.raise_if_cancelled."""
+
+
+class CancelToken:
+    """Cancellation flag shared with blocking work running off the event loop.
+
+    The work checks ``cancelled`` or calls ``raise_if_cancelled`` between
+    steps, and waits with ``wait`` instead of ``time.sleep`` so it wakes up as
+    soon as the token is cancelled. Tokens created with ``for_process=True``
+    share their event through a manager process and can be sent to the
+    process pool.
+    """
+
+    def __init__(self, for_process: bool = False):
+        self.for_process = for_process
+        self._event = _get_manager().Event() if for_process else threading.Event()
+        self.cancelled_at: float | None = None
+        self.stopped_at: float | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def stop_seconds(self) -> float | None:
+        """Time between the cancellation and the offloaded work having stopped."""
+        if self.cancelled_at is None or self.stopped_at is None:
+            return None
+        return self.stopped_at - self.cancelled_at
+
+    def cancel(self):
+        if self.cancelled_at is None:
+            self.cancelled_at = time.monotonic()
+        self._event.set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise WorkCancelled()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds, returns True early if cancelled."""
+        return self._event.wait(timeout)
+
+    def __getstate__(self):
+        # Only the event crosses to a worker process, timings stay in the parent
+        return {"for_process": self.for_process, "_event": self._event}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, cancelled_at=None, stopped_at=None)
+
+
+async def run_cancellable(
+    function: Callable[..., Any],
+    *args: Any,
+    token: CancelToken,
+    executor: ExecutorKind = "thread",
+    grace: float = 1.0,
+) -> Any:
+    """Run ``function(token, *args)`` in a thread or in the shared process pool.
+
+    If the awaiting task is cancelled, the token is cancelled and the work is
+    given ``grace`` seconds to stop before the cancellation propagates, so its
+    thread or worker process is free again. ``token.stop_seconds`` then tells
+    how long the work took to stop, it stays None for work ignoring the token,
+    which keeps running in the background.
+    """
+    pool = None
+    if executor == "process":
+        if not token.for_process:
+            raise ValueError("Process work needs a CancelToken(for_process=True)")
+        pool = _get_process_pool()
+
+    future = asyncio.get_running_loop().run_in_executor(pool, function, token, *args)
+    try:
+        # Shielded so a cancellation reaches the token, not just this await
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel()
+        # The calling task is cancelled, waiting for the work must be shielded too
+        with anyio.CancelScope(shield=True):
+            await asyncio.wait({future}, timeout=grace)
+        if future.done():
+            token.stopped_at = time.monotonic()
+            # The work most likely raised WorkCancelled, retrieve it to silence it
+            future.exception()
+        raise
@@ -0,0 +1,98 @@
+# SQLite store of checkpoints, so a re-invoked long-running tool resumes where it stopped
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+DEFAULT_CHECKPOINT_PATH = Path.home() / ".cache" / "mcp_cancellation" / "checkpoints.db"
+
+
+class CheckpointTooLarge(ValueError):
+    """Raised when a checkpoint exceeds the store's max_bytes."""
+
+
+class CheckpointStore:
+    """Checkpoints of long-running jobs, keyed by a client-supplied job id.
+
+    Each checkpoint is a JSON-serializable state replacing the previous one of
+    the same job. Checkpoints expire ``ttl`` seconds after their last write,
+    are refused above ``max_bytes``, and the least recently written ones are
+    evicted beyond ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        path: Path | str = DEFAULT_CHECKPOINT_PATH,
+        ttl: float = 24 * 3600,
+        max_bytes: int = 1024 * 1024,
+        max_entries: int = 10_000,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._writes = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        # WAL with NORMAL sync: a write is one append to the log, no fsync per commit
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS checkpoints (
+                job_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS checkpoints_updated ON checkpoints (updated)"
+        )
+        self.purge_expired()
+
+    def save(self, job_id: str, state: Any):
+        payload = json.dumps(state)
+        if len(payload) > self.max_bytes:
+            raise CheckpointTooLarge(
+                f"Checkpoint of job {job_id} is {len(payload)} bytes, "
+                f"the limit is {self.max_bytes}"
+            )
+        self._db.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+            (job_id, payload, time.time()),
+        )
+
+        # Evict only every 100 writes, counting rows on every save is not free
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._evict()
+
+    def load(self, job_id: str) -> Any | None:
+        """Return the last state saved for the job, or None if missing or expired."""
+        row = self._db.execute(
+            "SELECT state FROM checkpoints WHERE job_id = ? AND updated > ?",
+            (job_id, time.time() - self.ttl),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def delete(self, job_id: str):
+        self._db.execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+
+    def purge_expired(self):
+        self._db.execute(
+            "DELETE FROM checkpoints WHERE updated <= ?", (time.time() - self.ttl,)
+        )
+
+    def _evict(self):
+        self.purge_expired()
+        self._db.execute(
+            """DELETE FROM checkpoints WHERE job_id IN (
+                SELECT job_id FROM checkpoints ORDER BY updated DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,),
+        )
+
+    def close(self):
+        self._db.close()
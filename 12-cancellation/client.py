@@ -57,6 +57,12 @@ async def main():
         except Exception as e:
             console.print(f"Tool error ({type(e).__name__}): {e}", style="bold red")
 
+            # The cancelled request has no result, the steps done are kept by the server
+            partial = await client.call_tool(
+                "get_partial_result", {"request_id": str(executing_request_id)}
+            )
+            console.print(f"Partial result: {partial.data}", style="bold yellow")
+
         # Clean up the cancel task if it's still running
         if not cancel_task.done():
             cancel_task.cancel()
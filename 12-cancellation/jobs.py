@@ -0,0 +1,193 @@
+# Background jobs: submitted work runs in a bounded pool of workers and is polled by id
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Literal
+
+JobStatus = Literal["queued", "running", "completed", "failed", "cancelled"]
+
+FINISHED: set[JobStatus] = {"completed", "failed", "cancelled"}
+
+
+class QueueFull(Exception):
+    """Raised by submit when the queue of pending jobs is at its limit."""
+
+
+class UnknownJob(KeyError):
+    """Raised for a job id that was never submitted or has been forgotten."""
+
+
+@dataclass
+class JobInfo:
+    job_id: str
+    status: JobStatus
+    completed: int
+    total: int
+    submitted: float
+    started: float | None = None
+    finished: float | None = None
+    error: str | None = None
+
+
+@dataclass
+class JobResult:
+    job_id: str
+    status: JobStatus
+    results: list
+    error: str | None = None
+
+
+@dataclass
+class Job:
+    job_id: str
+    total: int
+    work: Callable[["Job"], Awaitable[None]]
+    status: JobStatus = "queued"
+    results: list = field(default_factory=list)
+    submitted: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    error: str | None = None
+    task: asyncio.Task | None = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def info(self) -> JobInfo:
+        return JobInfo(
+            self.job_id,
+            self.status,
+            len(self.results),
+            self.total,
+            self.submitted,
+            self.started,
+            self.finished,
+            self.error,
+        )
+
+    def result(self) -> JobResult:
+        """Results so far, all of them once the job completed."""
+        return JobResult(self.job_id, self.status, list(self.results), self.error)
+
+
+class JobManager:
+    """Runs submitted jobs on ``workers`` tasks fed by a bounded queue.
+
+    ``submit`` returns at once and raises QueueFull when ``max_queued`` jobs
+    are already waiting, so clients back off instead of piling up work. A job's
+    ``work`` coroutine appends to ``job.results`` as it progresses. Finished
+    jobs are kept for ``retention`` seconds and at most ``max_finished`` of
+    them, for clients to fetch their results.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        max_queued: int = 1000,
+        retention: float = 3600.0,
+        max_finished: int = 10_000,
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self.max_finished = max_finished
+        self._jobs: dict[str, Job] = {}
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._queue: asyncio.Queue[Job] | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+
+    def _start(self):
+        # Workers need the running loop, they start with the first submission
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._worker_tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    def submit(
+        self, job_id: str, total: int, work: Callable[[Job], Awaitable[None]]
+    ) -> Job:
+        self._forget_expired()
+        existing = self._jobs.get(job_id)
+        if existing is not None and existing.status not in FINISHED:
+            raise ValueError(f"Job {job_id} is already {existing.status}")
+
+        self._start()
+        job = Job(job_id, total, work)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(
+                f"{self._queue.qsize()} jobs are already queued, retry later"
+            )
+        self._jobs[job_id] = job
+        self._finished.pop(job_id, None)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise UnknownJob(job_id)
+        return job
+
+    async def cancel(self, job_id: str, timeout: float = 2.0) -> Job:
+        """Cancel a job, waiting up to ``timeout`` seconds for a running one to stop."""
+        job = self.get(job_id)
+        if job.status == "queued":
+            # Workers skip it when they dequeue it
+            self._finish(job, "cancelled")
+        elif job.status == "running":
+            job.task.cancel()
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except TimeoutError:
+                pass
+        return job
+
+    def stats(self) -> dict:
+        counts = {status: 0 for status in ("queued", "running", *FINISHED)}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {"workers": self.workers, "max_queued": self.max_queued, **counts}
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == "queued":
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.started = time.time()
+        job.task = asyncio.create_task(job.work(job))
+        # Waiting instead of awaiting the task keeps its cancellation out of the worker
+        await asyncio.wait({job.task})
+        if job.task.cancelled():
+            self._finish(job, "cancelled")
+        elif job.task.exception() is not None:
+            self._finish(job, "failed", str(job.task.exception()))
+        else:
+            self._finish(job, "completed")
+
+    def _finish(self, job: Job, status: JobStatus, error: str | None = None):
+        job.status = status
+        job.error = error
+        job.finished = time.time()
+        job.task = None
+        job.done.set()
+        self._finished[job.job_id] = job.finished
+        while len(self._finished) > self.max_finished:
+            job_id, _ = self._finished.popitem(last=False)
+            del self._jobs[job_id]
+
+    def _forget_expired(self):
+        cutoff = time.time() - self.retention
+        while self._finished:
+            job_id, finished = next(iter(self._finished.items()))
+            if finished > cutoff:
+                break
+            del self._finished[job_id]
+            del self._jobs[job_id]
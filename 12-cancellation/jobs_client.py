@@ -0,0 +1,47 @@
+import asyncio
+
+from fastmcp import Client
+from rich.console import Console
+
+console = Console()
+console.clear()
+
+
+async def main():
+    async with Client("http://localhost:8000/mcp") as client:
+
+        console.print("Client connected", style="bold green")
+
+        # Submitting returns at once with the job id, no request stays open
+        job_ids = []
+        for count in (3, 5, 10):
+            job = (await client.call_tool("submit_job", {"count": count})).data
+            console.print(f"Submitted job {job.job_id} ({count} steps)")
+            job_ids.append(job.job_id)
+
+        # Jobs are cancelled by their id, no need for the id of a request
+        await asyncio.sleep(2)
+        cancelled = (await client.call_tool("cancel_job", {"job_id": job_ids[-1]})).data
+        console.print(
+            f"Cancelled job {cancelled.job_id} after {cancelled.completed} steps",
+            style="bold red",
+        )
+
+        # Poll until every job has finished
+        pending = set(job_ids)
+        while pending:
+            await asyncio.sleep(1)
+            for job_id in sorted(pending):
+                job = (await client.call_tool("get_job", {"job_id": job_id})).data
+                console.print(f"Job {job_id}: {job.status} {job.completed}/{job.total}")
+                if job.status in ("completed", "failed", "cancelled"):
+                    pending.discard(job_id)
+
+        for job_id in job_ids:
+            result = (await client.call_tool("get_job_result", {"job_id": job_id})).data
+            console.print(
+                f"Job {job_id} {result.status}: {result.results}", style="bold magenta"
+            )
+
+
+asyncio.run(main())
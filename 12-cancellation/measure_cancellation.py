@@ -0,0 +1,77 @@
+# Measures time-to-stop: how long offloaded work keeps running after its task is cancelled
+
+import asyncio
+import random
+import statistics
+import time
+
+from cancellation import CancelToken, run_cancellable
+from rich.console import Console
+from rich.table import Table
+from work import STEP_SECONDS, run_step
+
+TRIALS = 10
+
+console = Console()
+
+
+async def cancel_after(task: asyncio.Task, delay: float) -> float:
+    await asyncio.sleep(delay)
+    task.cancel()
+    return time.monotonic()
+
+
+async def sleeping_thread() -> float:
+    """Before: the task is cancelled but the thread sleeps until the step ends."""
+    finished = asyncio.get_running_loop().create_future()
+
+    def step():
+        time.sleep(STEP_SECONDS)
+        finished.get_loop().call_soon_threadsafe(finished.set_result, time.monotonic())
+
+    task = asyncio.create_task(asyncio.to_thread(step))
+    cancelled_at = await cancel_after(task, random.uniform(0.1, 0.9))
+    return await finished - cancelled_at
+
+
+async def cancellable(function, executor: str) -> float:
+    """After: the token wakes the step up as soon as the task is cancelled."""
+    token = CancelToken(for_process=executor == "process")
+    task = asyncio.create_task(
+        run_cancellable(function, 0, token=token, executor=executor)
+    )
+    await cancel_after(task, random.uniform(0.1, 0.9))
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return token.stop_seconds
+
+
+async def main():
+    modes = {
+        "thread, time.sleep (before)": sleeping_thread,
+        "thread, CancelToken": lambda: cancellable(run_step, "thread"),
+        "process, CancelToken": lambda: cancellable(run_step, "process"),
+    }
+
+    table = Table(
+        title=f"Time-to-stop after cancel, {STEP_SECONDS:.0f}s steps, {TRIALS} trials"
+    )
+    for column in ("work", "mean ms", "max ms"):
+        table.add_column(column)
+
+    # Start the process pool up front, its startup is not part of stopping
+    await run_cancellable(
+        run_step, 0, token=CancelToken(for_process=True), executor="process"
+    )
+
+    for label, run in modes.items():
+        timings = [await run() * 1000 for _ in range(TRIALS)]
+        table.add_row(label, f"{statistics.mean(timings):.1f}", f"{max(timings):.1f}")
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
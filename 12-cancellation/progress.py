@@ -0,0 +1,116 @@
+# Progress reporting helpers: coalesced progress notifications and streamed partial results
+
+import json
+import math
+import time
+from typing import Any
+
+from fastmcp import Context
+
+
+class ThrottledProgress:
+    """Rate-limited wrapper around ``ctx.report_progress``.
+
+    An update is sent only once ``min_interval`` seconds have passed since the
+    previous notification and, when ``total`` is known, progress has moved by
+    at least ``min_delta`` of it. Skipped updates are coalesced: the latest one
+    is sent on the next notification or by ``flush``. The update reaching
+    ``total`` is always sent, and leaving the ``async with`` block without an
+    error flushes the last pending one.
+    """
+
+    def __init__(
+        self,
+        ctx: Context,
+        total: float | None = None,
+        min_interval: float = 0.1,
+        min_delta: float = 0.01,
+    ):
+        self.ctx = ctx
+        self.total = total
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.sent = 0
+        self.coalesced = 0
+        self._last_time = -math.inf
+        self._last_progress: float | None = None
+        self._pending: tuple[float, str | None] | None = None
+
+    async def __aenter__(self) -> "ThrottledProgress":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # A failed or cancelled operation must not look complete
+        if exc_type is None:
+            await self.flush()
+
+    def _due(self, progress: float, now: float) -> bool:
+        if now - self._last_time < self.min_interval:
+            return False
+        if self.total is None or self._last_progress is None:
+            return True
+        return progress - self._last_progress >= self.min_delta * self.total
+
+    async def update(self, progress: float, message: str | None = None):
+        now = time.monotonic()
+        final = self.total is not None and progress >= self.total
+        if final or self._due(progress, now):
+            await self.send(progress, message)
+        else:
+            self._pending = (progress, message)
+            self.coalesced += 1
+
+    async def flush(self):
+        """Send the latest coalesced update, if any."""
+        if self._pending is not None:
+            await self.send(*self._pending)
+
+    async def send(self, progress: float, message: str | None = None):
+        """Send an update right away, bypassing the throttling."""
+        # State is updated before awaiting, concurrent updates see this send
+        self._last_time = time.monotonic()
+        self._last_progress = progress
+        self._pending = None
+        self.sent += 1
+        await self.ctx.report_progress(
+            progress=progress, total=self.total, message=message
+        )
+
+
+class ResultStream:
+    """Streams partial results to the client along with progress notifications.
+
+    Results are buffered and sent as the JSON message
+    ``{"partial": [[index, result], ...]}`` of a progress notification, once
+    ``chunk_size`` are pending or ``max_delay`` seconds after the previous
+    chunk. The chunk completing the operation is sent with the final update.
+    Progress between chunks still goes through the throttled reporter.
+    """
+
+    def __init__(
+        self, progress: ThrottledProgress, chunk_size: int = 100, max_delay: float = 0.5
+    ):
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.max_delay = max_delay
+        self.chunks = 0
+        self._buffer: list[list[Any]] = []
+        self._last_time = time.monotonic()
+
+    async def add(self, completed: float, index: int, result: Any):
+        """Record the result of one item, ``completed`` being the progress so far."""
+        self._buffer.append([index, result])
+        now = time.monotonic()
+        total = self.progress.total
+        if (
+            len(self._buffer) >= self.chunk_size
+            or now - self._last_time >= self.max_delay
+            or (total is not None and completed >= total)
+        ):
+            message = json.dumps({"partial": self._buffer})
+            self._buffer = []
+            self._last_time = now
+            self.chunks += 1
+            await self.progress.send(completed, message)
+        else:
+            await self.progress.update(completed)
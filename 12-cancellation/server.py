@@ -1,10 +1,49 @@
 import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Annotated
 
+import anyio
+from cancellation import CancelToken, ExecutorKind, run_cancellable
+from checkpoints import DEFAULT_CHECKPOINT_PATH, CheckpointStore, CheckpointTooLarge
 from fastmcp import Context, FastMCP
 from fastmcp.exceptions import ToolError
+from jobs import Job, JobInfo, JobManager, JobResult, QueueFull, UnknownJob
+from progress import ResultStream, ThrottledProgress
+from pydantic import Field
+from work import run_step
 
 mcp = FastMCP(name="CancellationServer")
 
+# Steps completed by jobs started with a job id, so a retry resumes from there
+checkpoints = CheckpointStore(os.getenv("CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH))
+
+# Background jobs, polled by id instead of holding a request open
+jobs = JobManager(
+    workers=int(os.getenv("JOB_WORKERS", "8")),
+    max_queued=int(os.getenv("JOB_QUEUE_SIZE", "1000")),
+)
+
+# Number of cancelled operations whose partial result is kept
+MAX_PARTIAL_RESULTS = 100
+
+
+@dataclass
+class PartialResult:
+    request_id: str
+    completed: int
+    total: int
+    results: list[str]
+    stop_seconds: float | None = None
+
+
+# Partial results of cancelled operations, by client session and request id,
+# oldest first. Request ids restart with each session, the session keeps a
+# client from reading the results of another
+partial_results: OrderedDict[tuple[str, str], PartialResult] = OrderedDict()
+
 
 # Basic prompt returning a string (converted to user message automatically)
 @mcp.tool
@@ -13,19 +52,166 @@ def short_execution(topic: str, ctx: Context) -> str:
     return f"'{topic}' requested with request_id: {ctx.request_id}"
 
 
+def _checkpoint_key(tool: str, job_id: str) -> str:
+    """The checkpoints of each tool are kept apart, job ids are client-supplied."""
+    return f"{tool}/{job_id}"
+
+
+async def _checkpoint(key: str, results: list[str], ctx: Context):
+    try:
+        checkpoints.save(key, {"results": results})
+    except CheckpointTooLarge as e:
+        # The job can still complete, it just cannot be resumed past this point
+        await ctx.warning(str(e))
+
+
 # Long-running operation simulation with progress reporting and cancellation support
 @mcp.tool
-async def long_execution(count: int, ctx: Context) -> str:
-    """Generates a user message asking for a long-running operation."""
+async def long_execution(
+    count: int,
+    ctx: Context,
+    executor: ExecutorKind = "thread",
+    job_id: Annotated[
+        str | None,
+        Field(description="Checkpoint the steps under this id, to resume on retry"),
+    ] = None,
+) -> str:
+    """Generates a user message asking for a long-running operation.
+
+    Each step runs in a thread or a process. When the request is cancelled,
+    the running step is stopped and the steps completed so far can be
+    fetched with get_partial_result. With a job_id, every completed step is
+    checkpointed and calling again with the same job_id resumes after it.
+    """
+    token = CancelToken(for_process=executor == "process")
+    results: list[str] = []
+    key = None if job_id is None else _checkpoint_key("long_execution", job_id)
+    if key is not None:
+        state = checkpoints.load(key)
+        if state is not None:
+            results = state["results"][:count]
+            await ctx.info(f"Resuming job {job_id} after step {len(results)}")
     try:
-        for i in range(count):
-            await ctx.report_progress(progress=i, total=count)
-            await asyncio.sleep(1)
+        async with ThrottledProgress(ctx, total=count) as progress:
+            # Each completed step is streamed to the client as a partial result
+            steps = ResultStream(progress, chunk_size=1)
+            await progress.update(len(results))
+            for i in range(len(results), count):
+                result = await run_cancellable(
+                    run_step, i, token=token, executor=executor
+                )
+                results.append(result)
+                if key is not None:
+                    await _checkpoint(key, results, ctx)
+                await steps.add(i + 1, i, result)
 
+        if key is not None:
+            checkpoints.delete(key)
         return f"Completed long-running operation with {count} steps."
-    except Exception as e:
-        print(f"long_execution was cancelled after {i} steps out of {count}")
-        return f"Long execution was cancelled after {i} steps out of {count}"
+    except asyncio.CancelledError:
+        partial = PartialResult(
+            ctx.request_id, len(results), count, results, token.stop_seconds
+        )
+        partial_results[(ctx.session_id, ctx.request_id)] = partial
+        if len(partial_results) > MAX_PARTIAL_RESULTS:
+            partial_results.popitem(last=False)
+
+        print(f"long_execution was cancelled after {len(results)} steps out of {count}")
+        # The request is cancelled, only a shielded scope can still notify the client
+        with anyio.CancelScope(shield=True):
+            await ctx.warning(
+                f"Cancelled after {len(results)} of {count} steps, "
+                f"work stopped in {token.stop_seconds or 0:.3f}s"
+            )
+        # The cancellation must propagate for the request to finish cancelling
+        raise
+
+
+@mcp.tool
+def get_partial_result(request_id: str, ctx: Context) -> PartialResult:
+    """Returns the steps completed by a cancelled long_execution request.
+
+    Only the requests of the calling client session are found.
+    """
+    partial = partial_results.get((ctx.session_id, request_id))
+    if partial is None:
+        raise ToolError(f"No cancelled operation with request id {request_id}")
+    return partial
+
+
+async def _run_job(job: Job, executor: ExecutorKind):
+    """The steps of long_execution, run by a job worker with no request to report to."""
+    token = CancelToken(for_process=executor == "process")
+    key = _checkpoint_key("submit_job", job.job_id)
+    state = checkpoints.load(key)
+    if state is not None:
+        job.results[:] = state["results"][: job.total]
+
+    for i in range(len(job.results), job.total):
+        job.results.append(
+            await run_cancellable(run_step, i, token=token, executor=executor)
+        )
+        try:
+            checkpoints.save(key, {"results": job.results})
+        except CheckpointTooLarge:
+            # The job can still complete, it just cannot be resumed past this point
+            pass
+    checkpoints.delete(key)
+
+
+def _get_job(job_id: str) -> Job:
+    try:
+        return jobs.get(job_id)
+    except UnknownJob:
+        raise ToolError(f"Unknown job: {job_id}")
+
+
+@mcp.tool
+def submit_job(
+    count: int,
+    executor: ExecutorKind = "thread",
+    job_id: Annotated[
+        str | None,
+        Field(description="Id of the job, reusing one resumes from its checkpoint"),
+    ] = None,
+) -> JobInfo:
+    """Starts the steps of long_execution as a background job and returns at once.
+
+    Poll get_job with the returned job_id, then fetch get_job_result.
+    """
+    job_id = job_id or uuid.uuid4().hex
+    try:
+        job = jobs.submit(job_id, count, lambda job: _run_job(job, executor))
+    except QueueFull as e:
+        raise ToolError(f"Server busy: {e}")
+    except ValueError as e:
+        raise ToolError(str(e))
+    return job.info()
+
+
+@mcp.tool
+def get_job(job_id: str) -> JobInfo:
+    """Returns the status and progress of a background job."""
+    return _get_job(job_id).info()
+
+
+@mcp.tool
+def get_job_result(job_id: str) -> JobResult:
+    """Returns the results of a background job, partial until it completes."""
+    return _get_job(job_id).result()
+
+
+@mcp.tool
+async def cancel_job(job_id: str) -> JobInfo:
+    """Cancels a queued or running background job."""
+    _get_job(job_id)
+    return (await jobs.cancel(job_id)).info()
+
+
+@mcp.resource("data://jobs/stats")
+def job_stats() -> dict:
+    """Number of background jobs in each status, with the pool limits."""
+    return jobs.stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,15 @@
+# Blocking work offloaded by long_execution, kept free of server imports so
+# child processes start quickly
+
+from cancellation import CancelToken, WorkCancelled
+
+# Duration of one step of the long-running operation
+STEP_SECONDS = 1.0
+
+
+def run_step(token: CancelToken, step: int) -> str:
+    """One step of blocking work, which stops as soon as the token is cancelled."""
+    # Waiting on the token instead of time.sleep wakes up on cancellation
+    if token.wait(STEP_SECONDS):
+        raise WorkCancelled()
+    return f"Step {step + 1} completed"
@@ -1,12 +1,21 @@
 import asyncio
 import os
+import time
+from contextlib import AsyncExitStack
 
 from dotenv import load_dotenv
 from fastmcp import Client
 from fastmcp.client.elicitation import ElicitResult
 from fastmcp.client.sampling import RequestContext, SamplingMessage, SamplingParams
+from latency import LatencyHistogram
+from order_batch import (
+    BatchReply,
+    OrderBatch,
+    RoutedMessage,
+    RoutedResult,
+    ServerMessage,
+)
 from rich.console import Console
-from triage_server import ServerMessage
 
 load_dotenv()
 
@@ -14,40 +23,95 @@ console = Console()
 console.clear()
 
 
+class TraderConnection:
+    """Keeps one trader session open for the whole run and reconnects with backoff."""
+
+    def __init__(self, client: Client, retries: int = 5, backoff: float = 0.5):
+        self.client = client
+        self.retries = retries
+        self.backoff = backoff
+        self._lock = asyncio.Lock()
+        # Holds the "async with client" of the open session until it is closed
+        self._session: AsyncExitStack | None = None
+
+    async def _ensure_connected(self):
+        # Concurrent orders wait here while the first one opens the session
+        async with self._lock:
+            if self._session is not None and self.client.is_connected():
+                return
+            # Leave what is left of a dropped session before reconnecting, it is
+            # dead so no order is still using it
+            await self._close_session()
+            for attempt in range(self.retries + 1):
+                session = AsyncExitStack()
+                try:
+                    await session.enter_async_context(self.client)
+                    self._session = session
+                    return
+                except Exception:
+                    await session.aclose()
+                    if attempt == self.retries:
+                        raise
+                    await asyncio.sleep(self.backoff * 2**attempt)
+
+    async def _close_session(self):
+        session, self._session = self._session, None
+        if session is not None:
+            try:
+                await session.aclose()
+            except Exception:
+                pass
+
+    async def call_tool(self, name: str, arguments: dict):
+        # All orders are multiplexed over the same MCP session
+        await self._ensure_connected()
+        return await self.client.call_tool(name, arguments)
+
+    async def close(self):
+        async with self._lock:
+            await self._close_session()
+
+
+async def route_order(server_Message: ServerMessage) -> str:
+    console.print(
+        f"Calling trader server to {server_Message.action.upper()}...\n", style="white"
+    )
+    if server_Message.action not in ("buy", "sell"):
+        raise ValueError(f"Unknown action: {server_Message.action}")
+
+    start = time.perf_counter()
+    try:
+        response = await trader.call_tool(
+            server_Message.action,
+            {"stock": server_Message.stock, "quantity": server_Message.quantity},
+        )
+    finally:
+        routing_latency.record(time.perf_counter() - start)
+
+    console.print("\nResponse from trader server:\n", response, style="bold blue")
+    return response.content[0].text
+
+
 async def sampling_handler(
     messages: list[SamplingMessage],
     params: SamplingParams,
     context: RequestContext,
 ) -> str:
 
-    server_Message = ServerMessage.model_validate_json(messages[0].content.text)
-    console.print(
-        f"Calling trader server to {server_Message.action.upper()}...\n", style="white"
-    )
-    if server_Message.action == "buy":
-        async with trader:
-            response = await trader.call_tool(
-                "buy",
-                {"stock": server_Message.stock, "quantity": server_Message.quantity},
-            )
-            console.print(
-                "\nResponse from trader server:\n", response, style="bold blue"
-            )
-            return response.content[0].text
-
-    elif server_Message.action == "sell":
-        console.print("Proceeding with SELL order...\n", style="white")
-        async with trader:
-            response = await trader.call_tool(
-                "sell",
-                {"stock": server_Message.stock, "quantity": server_Message.quantity},
-            )
-            console.print(
-                "\nResponse from trader server:\n", response, style="bold blue"
-            )
-            return response.content[0].text
-    else:
-        raise ValueError(f"Unknown action: {server_Message.action}")
+    routed = RoutedMessage.validate_json(messages[0].content.text)
+
+    # A batch carries several netted orders, answer with one result per order.
+    # A failed order does not stop the others, the server is told which failed
+    if isinstance(routed, OrderBatch):
+        results = []
+        for order in routed.orders:
+            try:
+                results.append(RoutedResult(ok=True, result=await route_order(order)))
+            except Exception as e:
+                results.append(RoutedResult(ok=False, error=str(e)))
+        return BatchReply.dump_json(results).decode()
+
+    return await route_order(routed)
 
 
 async def elicitation_handler(message: str, response_type: type, params, context):
@@ -64,7 +128,11 @@ async def elicitation_handler(message: str, response_type: type, params, context
 
 
 client = Client(os.getenv("TRIAGE_SERVER_URL"), sampling_handler=sampling_handler)
-trader = Client(os.getenv("TRADER_SERVER_URL"), elicitation_handler=elicitation_handler)
+# The trader session stays open between orders instead of reconnecting for each one
+trader = TraderConnection(
+    Client(os.getenv("TRADER_SERVER_URL"), elicitation_handler=elicitation_handler)
+)
+routing_latency = LatencyHistogram()
 
 
 async def main():
@@ -91,5 +159,23 @@ async def main():
         console.print(result.content[0].text, style="bold cyan")
         console.print("--" * 40, style="white")
 
+        # Batch of orders, MSFT is netted to a single buy of 5 and AAPL cancels out
+        result = await client.call_tool(
+            "process_stock_orders",
+            {
+                "orders": [
+                    {"action": "buy", "stock": "MSFT", "quantity": 10},
+                    {"action": "sell", "stock": "MSFT", "quantity": 5},
+                    {"action": "buy", "stock": "AAPL", "quantity": 3},
+                    {"action": "sell", "stock": "AAPL", "quantity": 3},
+                ]
+            },
+        )
+        console.print(result.data, style="bold cyan")
+        console.print("--" * 40, style="white")
+
+    await trader.close()
+    console.print(routing_latency.render("Order routing latency"))
+
 
 asyncio.run(main())
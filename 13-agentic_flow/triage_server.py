@@ -2,19 +2,16 @@
 
 from typing import Literal
 
-from pydantic import BaseModel
-
-
-class ServerMessage(BaseModel):
-    action: Literal["buy", "sell", "abort"]
-    stock: str
-    quantity: float
-
-
 from fastmcp import Context, FastMCP
+from order_batch import OrderCoalescer, OrderResult, ServerMessage, StockOrder
 
 mcp = FastMCP("TriageServer")
 
+# How long orders of the same client session are collected before being routed
+BATCH_WINDOW_SECONDS = 0.05
+
+coalescer = OrderCoalescer(window=BATCH_WINDOW_SECONDS)
+
 
 @mcp.tool(
     name="process_stock_order",
@@ -35,5 +32,21 @@ async def process_stock_order(
     return f"Here's the response from the trader: {response.text}"
 
 
+@mcp.tool(
+    name="process_stock_orders",
+    title="A batch of stock orders",
+    meta={"version": "1.0"},
+    annotations={
+        "readOnlyHint": "false",
+        "idempotentHint": "false",
+    },
+)
+async def process_stock_orders(
+    orders: list[StockOrder], ctx: Context
+) -> list[OrderResult]:
+    """Process many buy or sell orders, netted per stock and routed in one request."""
+    return await coalescer.submit(orders, ctx)
+
+
 if __name__ == "__main__":
     mcp.run(transport="http", host="localhost", port=8000)
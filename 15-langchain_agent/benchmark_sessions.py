@@ -0,0 +1,75 @@
+# Compares the per-call latency of reconnecting on every tool call against the session pool
+# Start the trader server first: uv run trader_server.py
+
+import asyncio
+import statistics
+import time
+
+from fastmcp import Client
+from rich.console import Console
+from rich.table import Table
+from session_pool import MCPSessionPool
+
+TRADER_URL = "http://localhost:9000/mcp"
+CALLS = 200
+CONCURRENCY = 8
+
+console = Console()
+
+
+async def per_call_session(client: Client) -> float:
+    """Old behavior: connect, initialize and tear down around every call."""
+    start = time.perf_counter()
+    async with client:
+        await client.call_tool("get_stock_quote", {"symbol": "MSFT"})
+    return time.perf_counter() - start
+
+
+async def pooled_session(pool: MCPSessionPool) -> float:
+    """New behavior: borrow the session kept open by the pool."""
+    start = time.perf_counter()
+    async with pool.session("trader") as client:
+        await client.call_tool("get_stock_quote", {"symbol": "MSFT"})
+    return time.perf_counter() - start
+
+
+async def run(label: str, call, table: Table):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def limited():
+        async with semaphore:
+            return await call()
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(limited() for _ in range(CALLS)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    table.add_row(
+        label,
+        f"{statistics.mean(latencies_ms):.2f}",
+        f"{latencies_ms[len(latencies_ms) // 2]:.2f}",
+        f"{latencies_ms[int(len(latencies_ms) * 0.95)]:.2f}",
+        f"{CALLS / elapsed:.1f}",
+    )
+
+
+async def main():
+    table = Table(title=f"{CALLS} calls to get_stock_quote, {CONCURRENCY} in flight")
+    for column in ("mode", "mean ms", "p50 ms", "p95 ms", "calls/s"):
+        table.add_column(column)
+
+    # Each concurrent caller needs its own client, as the old code did per tool
+    await run("per-call session", lambda: per_call_session(Client(TRADER_URL)), table)
+
+    pool = MCPSessionPool({"trader": Client(TRADER_URL)}, max_concurrency=CONCURRENCY)
+    try:
+        await run("session pool", lambda: pooled_session(pool), table)
+    finally:
+        await pool.close()
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+# Compares agent startup (tool discovery) with and without the on-disk tool-schema cache
+# Start both servers first: uv run triage_server.py and uv run trader_server.py
+
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from client import MCPLangChainAdapter
+from fastmcp import Client
+from rich.console import Console
+from rich.table import Table
+from tool_cache import ToolSchemaCache
+
+SERVERS = {
+    "triage": "http://localhost:8000/mcp",
+    "trader": "http://localhost:9000/mcp",
+}
+RUNS = 10
+
+console = Console()
+
+
+async def startup(schema_cache: ToolSchemaCache | None) -> float:
+    """Time a fresh adapter discovering all tools, as a restarted agent would."""
+    adapter = MCPLangChainAdapter(schema_cache=schema_cache)
+    for server_name, url in SERVERS.items():
+        adapter.clients[server_name] = Client(url)
+
+    start = time.perf_counter()
+    await adapter.get_all_tools()
+    elapsed = time.perf_counter() - start
+
+    # Revalidation runs after startup, let it finish so runs do not overlap
+    await adapter.wait_revalidated()
+    await adapter.close()
+    return elapsed
+
+
+async def main():
+    table = Table(title=f"Tool discovery at startup, {RUNS} runs")
+    for column in ("mode", "mean ms", "min ms", "max ms"):
+        table.add_column(column)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = Path(cache_dir) / "tool_schemas.json"
+        modes = {
+            "no cache": lambda: startup(None),
+            # A new cache object each run, so the file is read back from disk
+            "warm cache": lambda: startup(ToolSchemaCache(cache_path)),
+        }
+
+        # Populate the cache once before timing the warm starts
+        await startup(ToolSchemaCache(cache_path))
+
+        for label, run in modes.items():
+            timings = [await run() * 1000 for _ in range(RUNS)]
+            table.add_row(
+                label,
+                f"{statistics.mean(timings):.2f}",
+                f"{min(timings):.2f}",
+                f"{max(timings):.2f}",
+            )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
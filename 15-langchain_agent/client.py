@@ -1,5 +1,6 @@
 import asyncio
 import os
+import time
 from typing import Dict, List
 
 from dotenv import load_dotenv
@@ -11,9 +12,18 @@ from langchain.tools import BaseTool
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_openai import AzureChatOpenAI
+from latency import LatencyHistogram
+from order_batch import (
+    BatchReply,
+    OrderBatch,
+    RoutedMessage,
+    RoutedResult,
+    ServerMessage,
+)
 from pydantic import BaseModel, Field, create_model
 from rich.console import Console
-from triage_server import ServerMessage
+from session_pool import MCPSessionPool
+from tool_cache import CachedTool, ToolSchemaCache, tool_list_hash
 
 load_dotenv()
 
@@ -24,12 +34,15 @@ console = Console()
 class DynamicMCPTool(BaseTool):
     """Dynamically generated LangChain tool from MCP server tool."""
 
-    client: Client = Field(exclude=True)
+    pool: MCPSessionPool = Field(exclude=True)
+    server_name: str
     tool_name: str
+    fingerprint: str = ""
 
     def __init__(
         self,
-        client: Client,
+        pool: MCPSessionPool,
+        server_name: str,
         lc_tool: BaseModel,
     ):
         # Extract tool information from MCP server
@@ -39,11 +52,13 @@ class DynamicMCPTool(BaseTool):
         super().__init__(
             name=tool_name,
             description=description,
-            client=client,
+            pool=pool,
+            server_name=server_name,
             tool_name=tool_name,
             args_schema=(
                 lc_tool.args_schema if hasattr(lc_tool, "args_schema") else None
             ),
+            fingerprint=getattr(lc_tool, "fingerprint", ""),
         )
 
     async def _arun(self, **kwargs) -> str:
@@ -53,8 +68,9 @@ class DynamicMCPTool(BaseTool):
                 f"\n🔧 LLM invoked tool: '{self.tool_name}' with args: {kwargs}\n",
                 style="dim yellow",
             )
-            async with self.client:
-                result = await self.client.call_tool(self.tool_name, kwargs)
+            # Reuse the long-lived session of the server instead of reconnecting
+            async with self.pool.session(self.server_name) as client:
+                result = await client.call_tool(self.tool_name, kwargs)
                 console.print(
                     f"\n✅ Tool '{self.tool_name}' completed successfully\n",
                     style="dim yellow",
@@ -75,45 +91,212 @@ class DynamicMCPTool(BaseTool):
 class MCPLangChainAdapter:
     """Adapter that dynamically converts MCP servers to LangChain tools."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        discovery_timeout: float = 10.0,
+        schema_cache: ToolSchemaCache | None = None,
+    ):
         self.clients: Dict[str, Client] = {}
+        self.discovery_timeout = discovery_timeout
+        self.discovery_timings: Dict[str, float] = {}
+        # Sessions are opened once and shared by every tool of the same server
+        self.pool = MCPSessionPool(self.clients, max_concurrency=max_concurrency)
+        # Optional on-disk cache of tool schemas, skips discovery on warm starts
+        self.schema_cache = schema_cache
+        self._tools: Dict[str, Dict[str, DynamicMCPTool]] = {}
+        # Bumped whenever revalidation changes the tools of a server
+        self.tools_version = 0
+        self._revalidations: List[asyncio.Task] = []
+
+    def _server_url(self, server_name: str) -> str:
+        return str(getattr(self.clients[server_name].transport, "url", server_name))
+
+    async def _list_server_tools(self, server_name: str) -> List[CachedTool]:
+        """Load the tool definitions of a single MCP server."""
+        async with self.pool.session(server_name) as client:
+            lc_tools = await load_mcp_tools(client.session)
+
+        return [
+            CachedTool(
+                name=lc_tool.name,
+                description=lc_tool.description,
+                args_schema=lc_tool.args_schema,
+            )
+            for lc_tool in lc_tools
+        ]
+
+    def _build_tools(
+        self, server_name: str, definitions: List[CachedTool]
+    ) -> List[DynamicMCPTool]:
+        """Create dynamic LangChain tools that call through the session pool."""
+        tools = [
+            DynamicMCPTool(pool=self.pool, server_name=server_name, lc_tool=definition)
+            for definition in definitions
+        ]
+        self._tools[server_name] = {tool.tool_name: tool for tool in tools}
+        return tools
+
+    async def _discover_server(self, server_name: str) -> List[DynamicMCPTool]:
+        """Load the tools of a server from the cache, or from the server itself."""
+        if self.schema_cache is not None:
+            cached = self.schema_cache.get(self._server_url(server_name))
+            if cached is not None:
+                cached_hash, definitions = cached
+                # Start with the cached tools and check the server in the background
+                self._revalidations.append(
+                    asyncio.create_task(self._revalidate(server_name, cached_hash))
+                )
+                return self._build_tools(server_name, definitions)
+
+        definitions = await self._list_server_tools(server_name)
+        if self.schema_cache is not None:
+            self.schema_cache.put(self._server_url(server_name), definitions)
+        return self._build_tools(server_name, definitions)
+
+    async def _revalidate(self, server_name: str, cached_hash: str):
+        """Compare the cached tools with the server and rebuild the ones that changed."""
+        try:
+            definitions = await asyncio.wait_for(
+                self._list_server_tools(server_name), timeout=self.discovery_timeout
+            )
+        except Exception as e:
+            console.print(
+                f"⚠️ Could not revalidate cached tools of '{server_name}': {e}",
+                style="dim red",
+            )
+            return
+
+        if tool_list_hash(definitions) == cached_hash:
+            return
+
+        current = self._tools.get(server_name, {})
+        for definition in definitions:
+            tool = current.get(definition.name)
+            if tool is None:
+                console.print(
+                    f"🆕 Tool '{definition.name}' was added to '{server_name}'",
+                    style="dim yellow",
+                )
+            elif tool.fingerprint != definition.fingerprint:
+                console.print(
+                    f"🔄 Tool '{definition.name}' of '{server_name}' was updated",
+                    style="dim yellow",
+                )
+
+        removed = set(current) - {definition.name for definition in definitions}
+        for name in sorted(removed):
+            console.print(
+                f"🗑️ Tool '{name}' was removed from '{server_name}'",
+                style="dim yellow",
+            )
+
+        # The agent binds the tool schemas to the LLM when it is created, changing
+        # the tools in place would not reach the model. They are rebuilt instead,
+        # and the new version tells the caller to rebuild its agent
+        self._build_tools(server_name, definitions)
+        self.tools_version += 1
+        self.schema_cache.put(self._server_url(server_name), definitions)
+
+    async def _timed_discovery(self, server_name: str):
+        """Discover a server's tools within the timeout, returning (tools, error, seconds)."""
+        start = time.perf_counter()
+        try:
+            tools = await asyncio.wait_for(
+                self._discover_server(server_name), timeout=self.discovery_timeout
+            )
+            return tools, None, time.perf_counter() - start
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.discovery_timeout}s"
+            return [], error, time.perf_counter() - start
+        except Exception as e:
+            return [], str(e), time.perf_counter() - start
 
     async def get_all_tools(self) -> List[DynamicMCPTool]:
         """Dynamically generate LangChain tools from all connected MCP servers."""
-        tools = []
+        server_names = list(self.clients)
 
-        for server_name, client in self.clients.items():
-            try:
-                async with client:
-                    lc_tools = await load_mcp_tools(client.session)
-
-                    for lc_tool in lc_tools:
-                        # Create a dynamic LangChain tool that wraps the associated client
-                        dynamic_tool = DynamicMCPTool(
-                            client=client,
-                            lc_tool=lc_tool,
-                        )
-                        tools.append(dynamic_tool)
-
-                        console.print(
-                            f"✅ Loaded tool '{lc_tool.name}' from server '{server_name}'",
-                            style="green",
-                        )
+        # Query all servers at once, a slow or dead server only costs its own timeout
+        results = await asyncio.gather(
+            *(self._timed_discovery(server_name) for server_name in server_names)
+        )
 
-            except Exception as e:
+        # Results are collected in registration order, so tool order is stable
+        tools = []
+        self.discovery_timings = {}
+        for server_name, (server_tools, error, elapsed) in zip(server_names, results):
+            self.discovery_timings[server_name] = elapsed
+
+            if error is not None:
                 console.print(
-                    f"❌ Failed to load tools from server '{server_name}': {e}",
+                    f"❌ Failed to load tools from server '{server_name}' ({elapsed:.2f}s): {error}",
                     style="red",
                 )
+                continue
+
+            for tool in server_tools:
+                console.print(
+                    f"✅ Loaded tool '{tool.name}' from server '{server_name}'",
+                    style="green",
+                )
+            console.print(
+                f"⏱️ Discovered {len(server_tools)} tools from '{server_name}' in {elapsed:.2f}s",
+                style="dim green",
+            )
+            tools.extend(server_tools)
 
         return tools
 
+    def current_tools(self) -> List[DynamicMCPTool]:
+        """The tools of every server, as last discovered or revalidated."""
+        return [
+            tool
+            for server_name in self.clients
+            for tool in self._tools.get(server_name, {}).values()
+        ]
+
+    async def wait_revalidated(self):
+        """Wait until the cached tools have been checked against the servers."""
+        await asyncio.gather(*self._revalidations)
+        self._revalidations.clear()
+
+    async def close(self):
+        """Stop pending revalidations and close the sessions kept open by the pool."""
+        for task in self._revalidations:
+            task.cancel()
+        await asyncio.gather(*self._revalidations, return_exceptions=True)
+        await self.pool.close()
+
 
 class MCPSamplingHandler:
     """Handles sampling requests from the triage server."""
 
-    def __init__(self, trader_client: Client):
-        self.trader_client = trader_client
+    def __init__(self, pool: MCPSessionPool, trader_name: str = "trader"):
+        # The trader session is borrowed from the pool, so it stays open between orders
+        # and concurrent sampling requests share it
+        self.pool = pool
+        self.trader_name = trader_name
+        self.latency = LatencyHistogram()
+
+    async def _route(self, server_message: ServerMessage) -> str:
+        """Send a single order to the matching trader tool."""
+        if server_message.action not in ("buy", "sell"):
+            return f"Unknown action: {server_message.action}"
+
+        start = time.perf_counter()
+        try:
+            async with self.pool.session(self.trader_name) as trader_client:
+                response = await trader_client.call_tool(
+                    server_message.action,
+                    {
+                        "stock": server_message.stock,
+                        "quantity": server_message.quantity,
+                    },
+                )
+        finally:
+            self.latency.record(time.perf_counter() - start)
+
+        return response.content[0].text if response.content else str(response.data)
 
     async def __call__(
         self,
@@ -123,38 +306,27 @@ class MCPSamplingHandler:
     ) -> str:
         """Handle sampling requests from triage server."""
         try:
-            # Parse the server message
-            server_message = ServerMessage.model_validate_json(messages[0].content.text)
+            # Parse the server message, either a single order or a batch
+            routed = RoutedMessage.validate_json(messages[0].content.text)
 
             console.print(
                 f"\n*Request transferred from Triage server to Trader server*\n",
                 style="yellow",
             )
 
-            # Route to appropriate trader tool
-            async with self.trader_client:
-                if server_message.action == "buy":
-                    response = await self.trader_client.call_tool(
-                        "buy",
-                        {
-                            "stock": server_message.stock,
-                            "quantity": server_message.quantity,
-                        },
-                    )
-                elif server_message.action == "sell":
-                    response = await self.trader_client.call_tool(
-                        "sell",
-                        {
-                            "stock": server_message.stock,
-                            "quantity": server_message.quantity,
-                        },
-                    )
-                else:
-                    return f"Unknown action: {server_message.action}"
-
-                return (
-                    response.content[0].text if response.content else str(response.data)
-                )
+            # A batch carries several netted orders, answer with one result per order.
+            # A failed order does not stop the others, the server is told which failed
+            if isinstance(routed, OrderBatch):
+                results = []
+                for order in routed.orders:
+                    try:
+                        result = await self._route(order)
+                        results.append(RoutedResult(ok=True, result=result))
+                    except Exception as e:
+                        results.append(RoutedResult(ok=False, error=str(e)))
+                return BatchReply.dump_json(results).decode()
+
+            return await self._route(routed)
 
         except Exception as e:
             return f"Error processing sampling request: {str(e)}"
@@ -191,6 +363,10 @@ async def main():
     console.print("=" * 60, style="white")
 
     try:
+        # Create the adapter, its session pool is shared with the sampling handler
+        adapter = MCPLangChainAdapter(schema_cache=ToolSchemaCache())
+        sampling_handler = MCPSamplingHandler(adapter.pool, trader_name="trader")
+
         # Create single client instances with proper handlers
         trader_client = Client(
             "http://localhost:9000/mcp",
@@ -200,11 +376,10 @@ async def main():
 
         triage_client = Client(
             "http://localhost:8000/mcp",
-            sampling_handler=MCPSamplingHandler(trader_client),
+            sampling_handler=sampling_handler,
         )
 
-        # Create the adapter and add the pre-configured clients
-        adapter = MCPLangChainAdapter()
+        # Add the pre-configured clients to the adapter
         adapter.clients["triage"] = triage_client
         adapter.clients["trader"] = trader_client
 
@@ -222,7 +397,7 @@ async def main():
         )
 
         # Get system prompt from triage MCP server
-        async with triage_client:
+        async with adapter.pool.session("triage") as triage_client:
             system_prompt = await triage_client.get_prompt(
                 "trader_system_prompt", {"stocks": ["MSFT", "AAPL"]}
             )
@@ -238,15 +413,19 @@ async def main():
             ]
         )
 
-        # Create LangChain agent with dynamically discovered tools
-        agent = create_openai_tools_agent(llm, tools, prompt)
-        agent_executor = AgentExecutor(
-            agent=agent,
-            tools=tools,
-            verbose=False,
-            handle_parsing_errors=True,
-            max_execution_time=60,
-        )
+        def build_executor(tools: List[DynamicMCPTool]) -> AgentExecutor:
+            # Create LangChain agent with dynamically discovered tools
+            agent = create_openai_tools_agent(llm, tools, prompt)
+            return AgentExecutor(
+                agent=agent,
+                tools=tools,
+                verbose=False,
+                handle_parsing_errors=True,
+                max_execution_time=60,
+            )
+
+        agent_executor = build_executor(tools)
+        tools_version = adapter.tools_version
 
         console.print(
             "\nYou can now enter stock trading commands or 'q' to exit",
@@ -260,6 +439,10 @@ async def main():
                     break
 
                 if user_input.strip():
+                    # Cached tools that turned out stale are bound to a new agent
+                    if adapter.tools_version != tools_version:
+                        tools_version = adapter.tools_version
+                        agent_executor = build_executor(adapter.current_tools())
                     result = await agent_executor.ainvoke({"input": user_input})
                     console.print(f"🤖 Agent: {result['output']}", style="bold green")
 
@@ -268,6 +451,8 @@ async def main():
             except Exception as e:
                 console.print(f"❌ Error: {str(e)}", style="bold red")
 
+        await adapter.close()
+        console.print(sampling_handler.latency.render("Order routing latency"))
         console.print("\n👋 Goodbye!", style="bold blue")
 
     except Exception as e:
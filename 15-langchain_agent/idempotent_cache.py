@@ -0,0 +1,137 @@
+# Middleware that memoizes tools and resources annotated with idempotentHint=True
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from pydantic_core import to_json
+
+
+def _size_of(value: Any) -> int:
+    """Approximate memory footprint of a cached result, in bytes."""
+    if isinstance(value, list):
+        # Resource reads return a list of ReadResourceContents
+        return sum(len(item.content) for item in value)
+    # Tool calls return a ToolResult
+    size = sum(len(to_json(block)) for block in value.content)
+    if value.structured_content is not None:
+        size += len(to_json(value.structured_content))
+    return size
+
+
+class IdempotentCacheMiddleware(Middleware):
+    """Caches the results of idempotent tools and resources.
+
+    Only components annotated with ``idempotentHint=True`` are cached, keyed on
+    the tool name and its canonicalized arguments or on the resource URI.
+    Entries expire after ``ttl`` seconds and the least recently used ones are
+    evicted once ``max_entries`` or ``max_bytes`` is exceeded. Tools and
+    resources listed in ``exclude`` (by name or URI) are never cached.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        exclude: Iterable[str] = (),
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.exclude = set(exclude)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+
+    def _get(self, key: tuple) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, size, value = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            self._bytes -= size
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: tuple, value: Any):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+
+        # Evict the least recently used entries until both bounds hold again
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    async def _cached(
+        self, key: tuple, context: MiddlewareContext, call_next: CallNext
+    ):
+        value = self._get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await call_next(context)
+        self._put(key, value)
+        return value
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext):
+        name = context.message.name
+        if name in self.exclude or context.fastmcp_context is None:
+            return await call_next(context)
+
+        tool = await context.fastmcp_context.fastmcp.get_tool(name)
+        if not (tool.annotations and tool.annotations.idempotentHint):
+            return await call_next(context)
+
+        # Same arguments in a different order must hit the same entry
+        arguments = json.dumps(
+            context.message.arguments or {}, sort_keys=True, default=str
+        )
+        return await self._cached(("tool", name, arguments), context, call_next)
+
+    async def on_read_resource(self, context: MiddlewareContext, call_next: CallNext):
+        uri = str(context.message.uri)
+        if uri in self.exclude or context.fastmcp_context is None:
+            return await call_next(context)
+
+        annotations = await self._resource_annotations(
+            context.fastmcp_context.fastmcp, uri
+        )
+        if not getattr(annotations, "idempotentHint", False):
+            return await call_next(context)
+
+        return await self._cached(("resource", uri), context, call_next)
+
+    async def _resource_annotations(self, server, uri: str):
+        resources = await server.get_resources()
+        if uri in resources:
+            return resources[uri].annotations
+
+        # Templated URIs take the annotations of the template they expand
+        for template in (await server.get_resource_templates()).values():
+            if template.matches(uri) is not None:
+                return template.annotations
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
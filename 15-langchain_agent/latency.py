@@ -0,0 +1,36 @@
+# Latency histogram of the orders routed to the trader server
+
+from rich.table import Table
+
+
+class LatencyHistogram:
+    """Counts latencies into fixed millisecond buckets."""
+
+    BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        milliseconds = seconds * 1000
+        self.total += milliseconds
+        for index, bound in enumerate(self.BUCKETS_MS):
+            if milliseconds <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def render(self, title: str) -> Table:
+        table = Table(title=title)
+        table.add_column("latency")
+        table.add_column("orders", justify="right")
+        lower = 0
+        for bound, count in zip(self.BUCKETS_MS, self.counts):
+            table.add_row(f"{lower}-{bound} ms", str(count))
+            lower = bound
+        table.add_row(f"> {lower} ms", str(self.counts[-1]))
+        calls = sum(self.counts)
+        if calls:
+            table.caption = f"{calls} orders, mean {self.total / calls:.1f} ms"
+        return table
@@ -0,0 +1,166 @@
+# Order models shared by the triage server and its clients, and the coalescer
+# netting the orders of a client session before routing them in one batch
+
+import asyncio
+from collections import defaultdict
+from typing import Annotated, Literal
+
+from fastmcp import Context
+from fastmcp.exceptions import ToolError
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+
+class ServerMessage(BaseModel):
+    action: Literal["buy", "sell", "abort"]
+    stock: str
+    quantity: float
+
+
+class StockOrder(BaseModel):
+    action: Annotated[
+        Literal["buy", "sell"], Field(description="Either 'buy' or 'sell'")
+    ]
+    stock: Annotated[
+        str, Field(description="Stock symbol (e.g., 'AAPL', 'MSFT')", min_length=1)
+    ]
+    quantity: Annotated[float, Field(description="Number of shares to trade", gt=0)]
+
+
+class OrderResult(BaseModel):
+    action: Literal["buy", "sell"]
+    stock: str
+    quantity: float
+    net_order: str | None = None
+    # False when the net order of the stock failed or its outcome is unknown
+    ok: bool = True
+    result: str
+
+
+# Several netted orders routed with a single sampling request
+class OrderBatch(BaseModel):
+    orders: list[ServerMessage]
+
+
+# Lets the client tell single orders and batches apart
+RoutedMessage = TypeAdapter(ServerMessage | OrderBatch)
+
+
+# The client's answer for one order of a batch, it routes each order on its own
+class RoutedResult(BaseModel):
+    ok: bool
+    result: str | None = None
+    error: str | None = None
+
+
+# A batch is answered with one RoutedResult per order, in the same order
+BatchReply = TypeAdapter(list[RoutedResult])
+
+
+# Net quantities are rounded to this many decimals, so that float leftovers of
+# orders cancelling out (0.1 + 0.2 - 0.3) are not routed as orders
+QUANTITY_DECIMALS = 6
+
+
+class OrderCoalescer:
+    """Collects the orders of a client session for a short window and nets them per stock."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: dict[str, list[tuple[StockOrder, asyncio.Future]]] = {}
+
+    async def submit(self, orders: list[StockOrder], ctx: Context) -> list[OrderResult]:
+        loop = asyncio.get_running_loop()
+        entries = [(order, loop.create_future()) for order in orders]
+        futures = [future for _, future in entries]
+
+        # A batch is already collecting orders for this session, join it
+        key = ctx.session_id
+        if key in self._pending:
+            self._pending[key].extend(entries)
+            # Shielded, cancelling this call must not cancel the results the
+            # batch is routing for everyone, the trades may already be executed
+            return await asyncio.shield(asyncio.gather(*futures))
+
+        # Otherwise this call opens the window and routes everything collected
+        self._pending[key] = entries
+        try:
+            try:
+                await asyncio.sleep(self.window)
+            finally:
+                batch = self._pending.pop(key)
+            await self._route(batch, ctx)
+        except BaseException as e:
+            # Do not leave the calls that joined this batch waiting forever,
+            # this call raises instead of awaiting its own futures
+            own = set(futures)
+            for _, future in batch:
+                if not future.done() and future not in own:
+                    future.set_exception(
+                        ToolError(f"Order batch was not routed: {e!r}")
+                    )
+            raise
+        return await asyncio.gather(*futures)
+
+    async def _route(
+        self, batch: list[tuple[StockOrder, asyncio.Future]], ctx: Context
+    ):
+        # Buys and sells of the same stock cancel each other out
+        net: dict[str, float] = defaultdict(float)
+        for order, _ in batch:
+            net[order.stock] += (
+                order.quantity if order.action == "buy" else -order.quantity
+            )
+
+        routed = []
+        for stock, quantity in net.items():
+            quantity = round(quantity, QUANTITY_DECIMALS)
+            if quantity != 0:
+                routed.append(
+                    ServerMessage(
+                        action="buy" if quantity > 0 else "sell",
+                        stock=stock,
+                        quantity=abs(quantity),
+                    )
+                )
+
+        # One sampling round trip for all the netted orders
+        results: dict[str, tuple[ServerMessage, RoutedResult]] = {}
+        if routed:
+            response = await ctx.sample(
+                messages=OrderBatch(orders=routed).model_dump_json()
+            )
+            try:
+                replies = BatchReply.validate_json(response.text)
+            except ValidationError:
+                # Not one result per order, which orders were executed is unknown
+                replies = [
+                    RoutedResult(
+                        ok=False,
+                        error=f"Unexpected reply, status unknown: {response.text}",
+                    )
+                ] * len(routed)
+            # A short reply only fails the orders it has no result for
+            replies += [
+                RoutedResult(ok=False, error="No result returned for this order")
+            ] * (len(routed) - len(replies))
+            for message, reply in zip(routed, replies):
+                results[message.stock] = (message, reply)
+
+        for order, future in batch:
+            # Left by a call that failed before its batch was routed
+            if future.done():
+                continue
+            ok = True
+            if order.stock in results:
+                message, reply = results[order.stock]
+                net_order = f"{message.action} {message.quantity} {message.stock}"
+                ok = reply.ok
+                text = reply.result if reply.ok else f"Order failed: {reply.error}"
+            else:
+                net_order = None
+                text = f"Offset by opposite orders on {order.stock}, nothing routed"
+            future.set_result(
+                OrderResult(
+                    **order.model_dump(), net_order=net_order, ok=ok, result=text or ""
+                )
+            )
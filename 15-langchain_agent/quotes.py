@@ -0,0 +1,124 @@
+# Stock quote sources and a TTL cache that shares in-flight lookups between callers
+
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Protocol
+
+
+class QuoteSource(Protocol):
+    """Anything able to return the current price of a symbol, None if unknown."""
+
+    async def get_quote(self, symbol: str) -> float | None: ...
+
+
+class StaticQuoteSource:
+    """Fixed prices, the data the trader server has always answered with."""
+
+    def __init__(self, prices: Dict[str, float] | None = None):
+        self.prices = prices or {"AAPL": 238.78, "MSFT": 510.00}
+
+    async def get_quote(self, symbol: str) -> float | None:
+        return self.prices.get(symbol)
+
+
+class SimulatedMarketFeed:
+    """Local random-walk market with a configurable lookup delay, for load tests."""
+
+    def __init__(
+        self,
+        symbols: Iterable[str] = ("AAPL", "MSFT"),
+        latency: float = 0.05,
+        volatility: float = 0.01,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.volatility = volatility
+        self._random = random.Random(seed)
+        self._prices = {symbol: self._random.uniform(50, 500) for symbol in symbols}
+        self.lookups = 0
+
+    async def get_quote(self, symbol: str) -> float | None:
+        self.lookups += 1
+        # Simulate the round trip to a market data provider
+        await asyncio.sleep(self.latency)
+        if symbol not in self._prices:
+            return None
+        change = self._random.gauss(0, self.volatility)
+        self._prices[symbol] = round(self._prices[symbol] * (1 + change), 2)
+        return self._prices[symbol]
+
+
+class QuoteCache:
+    """Caches quotes for `ttl` seconds and lets concurrent callers share one lookup.
+
+    Symbols come from clients, so at most `max_entries` are kept, the least
+    recently used ones are evicted beyond.
+    """
+
+    def __init__(self, source: QuoteSource, ttl: float = 5.0, max_entries: int = 1024):
+        self.source = source
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, float | None]] = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, symbol: str) -> float | None:
+        entry = self._entries.get(symbol)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(symbol)
+                return entry[1]
+            del self._entries[symbol]
+
+        # Another caller is already fetching this symbol, wait for its answer
+        if symbol in self._inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self._inflight[symbol])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[symbol] = future
+        try:
+            price = await self.source.get_quote(symbol)
+        except BaseException as e:
+            # Waiters must not hang when the lookup fails or its caller is cancelled
+            if not isinstance(e, Exception):
+                e = RuntimeError(f"Quote lookup for '{symbol}' was cancelled")
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            self._entries[symbol] = (time.monotonic() + self.ttl, price)
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            future.set_result(price)
+            return price
+        finally:
+            del self._inflight[symbol]
+
+    async def get_many(self, symbols: Iterable[str]) -> Dict[str, float | None]:
+        unique = list(dict.fromkeys(symbols))
+        prices = await asyncio.gather(*(self.get(symbol) for symbol in unique))
+        return dict(zip(unique, prices))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "cached_symbols": len(self._entries),
+            "ttl_seconds": self.ttl,
+        }
@@ -0,0 +1,161 @@
+# Keeps MCP client sessions open across tool calls instead of reconnecting every time
+
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Set
+
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+from mcp.shared.exceptions import McpError
+
+
+# Compared by identity, sessions are kept in a set
+@dataclass(eq=False)
+class _PooledSession:
+    """An open session of a server and the calls currently borrowing it."""
+
+    client: Client
+    stack: AsyncExitStack
+    last_used: float
+    borrowers: int = 0
+    retired: bool = False
+
+
+class MCPSessionPool:
+    """Long-lived MCP sessions shared by all the tools of a server.
+
+    A single MCP session multiplexes concurrent requests, so each server keeps
+    one open session and a semaphore caps how many calls run on it at once.
+    Idle sessions are pinged before reuse and reopened if they went away,
+    retrying the connection with exponential backoff.
+
+    A call failing with a transport error retires its session: later calls
+    get a new one, while the calls still running on the old one finish and
+    the last of them closes it. Sessions are opened on ``client.new()``
+    copies of the configured clients, with ``async with``.
+    """
+
+    def __init__(
+        self,
+        clients: Dict[str, Client],
+        max_concurrency: int = 4,
+        health_check_interval: float = 30.0,
+        connect_retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.clients = clients
+        self.max_concurrency = max_concurrency
+        self.health_check_interval = health_check_interval
+        self.connect_retries = connect_retries
+        self.backoff = backoff
+        self._limits: Dict[str, int] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._sessions: Dict[str, _PooledSession] = {}
+        # Retired sessions still borrowed, closed by their last borrower
+        self._retired: Set[_PooledSession] = set()
+
+    def set_max_concurrency(self, server_name: str, limit: int) -> None:
+        """Override the number of concurrent calls allowed for one server."""
+        if limit < 1:
+            raise ValueError("max concurrency must be at least 1")
+        self._limits[server_name] = limit
+        self._semaphores.pop(server_name, None)
+
+    def _semaphore(self, server_name: str) -> asyncio.Semaphore:
+        if server_name not in self._semaphores:
+            limit = self._limits.get(server_name, self.max_concurrency)
+            self._semaphores[server_name] = asyncio.Semaphore(limit)
+        return self._semaphores[server_name]
+
+    async def _open(self, server_name: str) -> _PooledSession:
+        # A copy of the configured client, a retired session may still be in use
+        client = self.clients[server_name].new()
+        for attempt in range(self.connect_retries + 1):
+            stack = AsyncExitStack()
+            try:
+                await stack.enter_async_context(client)
+                return _PooledSession(client, stack, time.monotonic())
+            except Exception:
+                await stack.aclose()
+                if attempt == self.connect_retries:
+                    raise
+                # Exponential backoff so a restarting server is not hammered
+                await asyncio.sleep(self.backoff * 2**attempt)
+
+    async def _acquire(self, server_name: str) -> _PooledSession:
+        """Borrow the open session of the server, (re)connecting when needed."""
+        lock = self._locks.setdefault(server_name, asyncio.Lock())
+
+        async with lock:
+            pooled = self._sessions.get(server_name)
+            if pooled is not None and pooled.client.is_connected():
+                idle = time.monotonic() - pooled.last_used
+                healthy = idle < self.health_check_interval
+                if not healthy:
+                    try:
+                        await pooled.client.ping()
+                        healthy = True
+                    except Exception:
+                        pass
+                if healthy:
+                    pooled.borrowers += 1
+                    return pooled
+
+            # The session went away, it is replaced
+            if pooled is not None:
+                await self._retire(server_name, pooled)
+            pooled = self._sessions[server_name] = await self._open(server_name)
+            pooled.borrowers += 1
+            return pooled
+
+    async def _retire(self, server_name: str, pooled: _PooledSession) -> None:
+        """Stop handing out a session, and close it once no call uses it."""
+        if self._sessions.get(server_name) is pooled:
+            del self._sessions[server_name]
+        pooled.retired = True
+        if pooled.borrowers == 0:
+            await self._close_session(pooled)
+        else:
+            self._retired.add(pooled)
+
+    async def _close_session(self, pooled: _PooledSession) -> None:
+        self._retired.discard(pooled)
+        try:
+            await pooled.stack.aclose()
+        except Exception:
+            # The session was already broken
+            pass
+
+    @asynccontextmanager
+    async def session(self, server_name: str) -> AsyncIterator[Client]:
+        """Borrow the open session of a server for the duration of the block."""
+        async with self._semaphore(server_name):
+            pooled = await self._acquire(server_name)
+            try:
+                yield pooled.client
+            except (ToolError, McpError):
+                # The server answered, the session is healthy
+                raise
+            except Exception:
+                # Calls are not retried since tools like buy/sell are not idempotent.
+                # Other calls may still be running on the session, it is only retired
+                async with self._locks[server_name]:
+                    if not pooled.retired:
+                        await self._retire(server_name, pooled)
+                raise
+            finally:
+                pooled.borrowers -= 1
+                pooled.last_used = time.monotonic()
+                if pooled.retired and pooled.borrowers == 0:
+                    await self._close_session(pooled)
+
+    async def close(self) -> None:
+        """Close every session opened by the pool."""
+        sessions = list(self._sessions.values()) + list(self._retired)
+        self._sessions.clear()
+        for pooled in sessions:
+            pooled.retired = True
+            await self._close_session(pooled)
@@ -0,0 +1,75 @@
+# Persists the tool schemas discovered from MCP servers so the agent can start without listing them again
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel
+
+DEFAULT_CACHE_PATH = (
+    Path.home() / ".cache" / "mcp_langchain_agent" / "tool_schemas.json"
+)
+
+
+class CachedTool(BaseModel):
+    """The parts of an MCP tool needed to rebuild its LangChain wrapper."""
+
+    name: str
+    description: str = ""
+    args_schema: dict | None = None
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the tool definition, changes whenever the schema does."""
+        payload = json.dumps(self.model_dump(), sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def tool_list_hash(tools: List[CachedTool]) -> str:
+    """Hash of a whole tool list, independent of the order tools are listed in."""
+    fingerprints = sorted(tool.fingerprint for tool in tools)
+    return hashlib.sha256("".join(fingerprints).encode()).hexdigest()
+
+
+class ToolSchemaCache:
+    """JSON file holding the tool list of each server, keyed by server URL."""
+
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self._entries: Dict[str, dict] | None = None
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.path.read_text())
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, server_url: str) -> Tuple[str, List[CachedTool]] | None:
+        """Return the (hash, tools) stored for a server, or None on a miss."""
+        entry = self._load().get(server_url)
+        if entry is None:
+            return None
+        tools = [CachedTool.model_validate(tool) for tool in entry["tools"]]
+        # An entry edited or corrupted on disk no longer matches its hash
+        if tool_list_hash(tools) != entry["hash"]:
+            return None
+        return entry["hash"], tools
+
+    def put(self, server_url: str, tools: List[CachedTool]) -> str:
+        """Store the tool list of a server and return its hash."""
+        tools_hash = tool_list_hash(tools)
+        self._load()[server_url] = {
+            "hash": tools_hash,
+            "tools": [tool.model_dump() for tool in tools],
+        }
+
+        # Write to a temporary file first so a crash never leaves a truncated cache
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._entries, indent=2))
+        os.replace(tmp_path, self.path)
+        return tools_hash
@@ -1,14 +1,40 @@
 import asyncio
+import os
 
 from fastmcp import Context, FastMCP
+from idempotent_cache import IdempotentCacheMiddleware
 from pydantic import BaseModel, Field
+from quotes import QuoteCache, SimulatedMarketFeed, StaticQuoteSource
 from typing_extensions import Annotated
 
 # Toggle to include/exclude the comprehensive stock info tool,
 STOCK_INFO = False
 
+# Quotes are cached for this many seconds, set QUOTE_SOURCE=simulated to drive load tests
+QUOTE_TTL_SECONDS = float(os.getenv("QUOTE_TTL_SECONDS", "5"))
+quote_source = (
+    SimulatedMarketFeed()
+    if os.getenv("QUOTE_SOURCE") == "simulated"
+    else StaticQuoteSource()
+)
+quote_cache = QuoteCache(quote_source, ttl=QUOTE_TTL_SECONDS)
+
 mcp = FastMCP("TraderServer")
 
+# Memoizes the idempotent tools other than the quotes, which quote_cache
+# already caches, a second cache would only serve staler quotes
+mcp.add_middleware(
+    IdempotentCacheMiddleware(
+        ttl=300.0, exclude=["get_stock_quote", "get_stock_quotes"]
+    )
+)
+
+
+def format_quote(symbol: str, price: float | None) -> str:
+    if price is None:
+        return f"Sorry, I don't have data for the stock symbol '{symbol}'."
+    return f"The current price of {symbol} is ${price:.2f}"
+
 
 async def progress(ctx: Context):
     await ctx.report_progress(progress=1, total=3, message="Contacting broker...")
@@ -61,12 +87,34 @@ async def get_stock_quote(
     ctx: Context,
 ) -> str:
     """Get the current stock quote."""
-    if symbol == "AAPL":
-        return "The current price of AAPL is $238.78"
-    elif symbol == "MSFT":
-        return "The current price of MSFT is $510.00"
-    else:
-        return f"Sorry, I don't have data for the stock symbol '{symbol}'."
+    return format_quote(symbol, await quote_cache.get(symbol))
+
+
+@mcp.tool(
+    name="get_stock_quotes",
+    description="Provide the current stock quotes for several stock symbols at once.",
+    annotations={
+        "readOnlyHint": "true",
+        "idempotentHint": "true",
+    },
+)
+async def get_stock_quotes(
+    symbols: Annotated[
+        list[str],
+        Field(description="Stock symbols (e.g., ['AAPL', 'MSFT'])", min_length=1),
+    ],
+    ctx: Context,
+) -> dict[str, str]:
+    """Get the current quotes of several stocks."""
+    prices = await quote_cache.get_many(symbols)
+    return {symbol: format_quote(symbol, price) for symbol, price in prices.items()}
+
+
+# Hit and miss counters of the quote cache
+@mcp.resource("data://quote-cache/stats", mime_type="application/json")
+def get_quote_cache_stats() -> dict:
+    """Provides the quote cache hit/miss statistics."""
+    return quote_cache.stats()
 
 
 # Add comprehensive stock info tool if enabled
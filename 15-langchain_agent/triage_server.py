@@ -3,19 +3,17 @@
 from textwrap import dedent
 from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field
-
-
-class ServerMessage(BaseModel):
-    action: Literal["buy", "sell", "abort"]
-    stock: str
-    quantity: float
-
-
 from fastmcp import Context, FastMCP
+from order_batch import OrderCoalescer, OrderResult, ServerMessage, StockOrder
+from pydantic import Field
 
 mcp = FastMCP("TriageServer")
 
+# How long orders of the same client session are collected before being routed
+BATCH_WINDOW_SECONDS = 0.05
+
+coalescer = OrderCoalescer(window=BATCH_WINDOW_SECONDS)
+
 
 @mcp.tool(
     name="process_stock_order",
@@ -44,6 +42,25 @@ async def process_stock_order(
     return f"Here's the response from the trader: {response.text}"
 
 
+@mcp.tool(
+    name="process_stock_orders",
+    description="Use this tool when the user asks for several orders at once.",
+    meta={"version": "1.0"},
+    annotations={
+        "readOnlyHint": "false",
+        "idempotentHint": "false",
+    },
+)
+async def process_stock_orders(
+    orders: Annotated[
+        list[StockOrder], Field(description="The orders to process", min_length=1)
+    ],
+    ctx: Context,
+) -> Annotated[list[OrderResult], Field(description="The result of each order")]:
+    """Process many buy or sell orders, netted per stock and routed in one request."""
+    return await coalescer.submit(orders, ctx)
+
+
 @mcp.prompt
 def trader_system_prompt(stocks: list[str]) -> str:
     """Generates the system prompt."""